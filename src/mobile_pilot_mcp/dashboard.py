@@ -3,28 +3,86 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import logging
 import os
 import time
 import webbrowser
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from aiohttp import WSMsgType, web
 
+try:
+    import orjson
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Dashboard configuration (can be overridden via environment variables)
 DASHBOARD_PORT = int(os.environ.get("DASHBOARD_PORT", "8200"))
 DASHBOARD_AUTO_OPEN = os.environ.get("DASHBOARD_AUTO_OPEN", "true").lower() in ("true", "1", "yes")
 
+# Broadcast queue settings
+OUTBOX_MAX_SIZE = 1024
+BROADCAST_BATCH_SIZE = 32
+
+# Cap on concurrent dashboard WebSocket clients (each one multiplies broadcast work)
+MAX_WS_CLIENTS = 32
+
+# Maximum number of result characters sent to the dashboard per tool call
+RESULT_PREVIEW_CHARS = 500
+
+# Maximum length of a single string argument sent to the dashboard
+ARGUMENT_PREVIEW_CHARS = 200
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Encode an object as UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data: bytes | str) -> Any:
+    """Decode JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _preview_arguments(arguments: dict[str, Any]) -> dict[str, Any]:
+    """Truncate long string arguments (typed text, clipboard payloads) for display.
 
-@dataclass
+    Returns the original dict when nothing needs truncating, which is the
+    common case, so no copy is made.
+    """
+    limit = ARGUMENT_PREVIEW_CHARS
+    if not any(isinstance(v, str) and len(v) > limit for v in arguments.values()):
+        return arguments
+    return {
+        k: f"{v[:limit]}...<+{len(v) - limit}>" if isinstance(v, str) and len(v) > limit else v
+        for k, v in arguments.items()
+    }
+
+
+def _json_response(obj: Any, status: int = 200) -> web.Response:
+    """Build a JSON response from pre-encoded bytes."""
+    return web.Response(body=_json_dumps(obj), status=status, content_type="application/json")
+
+
+@dataclass(slots=True)
 class ToolCall:
-    """Represents a single tool call."""
+    """Represents a single tool call.
+
+    Uses __slots__: the dashboard keeps up to max_calls of these alive and
+    reads their fields on every broadcast.
+    """
 
     id: int
     timestamp: float
@@ -34,19 +92,34 @@ class ToolCall:
     result: str | None = None
     error: str | None = None
     duration_ms: float | None = None
+    # Cached to_dict() snapshot, reset whenever the call is mutated
+    _dict_cache: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+    _time_str: str | None = field(default=None, init=False, repr=False, compare=False)
+    # Truncated result, computed once when the call completes
+    result_preview: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def time_str(self) -> str:
+        """Wall-clock time of the call, formatted once (it never changes)."""
+        if self._time_str is None:
+            self._time_str = datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S")
+        return self._time_str
 
     def to_dict(self) -> dict[str, Any]:
-        return {
+        if self._dict_cache is not None:
+            return self._dict_cache
+        self._dict_cache = {
             "id": self.id,
             "timestamp": self.timestamp,
-            "time_str": datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S"),
+            "time_str": self.time_str,
             "tool_name": self.tool_name,
-            "arguments": self.arguments,
+            "arguments": _preview_arguments(self.arguments),
             "status": self.status,
-            "result": self.result[:500] if self.result and len(self.result) > 500 else self.result,
+            "result": self.result_preview,
             "error": self.error,
             "duration_ms": self.duration_ms,
         }
+        return self._dict_cache
 
 
 class DashboardState:
@@ -54,7 +127,7 @@ class DashboardState:
 
     def __init__(self, max_calls: int = 100):
         self.max_calls = max_calls
-        self.tool_calls: list[ToolCall] = []
+        self.tool_calls: deque[ToolCall] = deque(maxlen=max_calls)
         self.call_counter = 0
         self.websockets: set[web.WebSocketResponse] = set()
         self.server_start_time = time.time()
@@ -64,6 +137,12 @@ class DashboardState:
         self.recording_active: bool = False
         # Callback for executing tools from the dashboard
         self.tool_executor: Any = None  # Will be set by server.py
+        # Pending broadcast messages, drained by a single broadcaster task
+        self._outbox: asyncio.Queue[dict[str, Any]] | None = None
+        self._broadcaster_task: asyncio.Task[None] | None = None
+        # Serialized /api/state response: (monotonic timestamp, JSON bytes)
+        self._state_cache: tuple[float, bytes] | None = None
+        self._state_cache_ttl = 0.1
 
     def add_tool_call(self, tool_name: str, arguments: dict[str, Any]) -> ToolCall:
         """Add a new tool call and return it."""
@@ -74,17 +153,15 @@ class DashboardState:
             tool_name=tool_name,
             arguments=arguments,
         )
+        # Bounded deque: the oldest call is dropped once max_calls is reached
         self.tool_calls.append(call)
-
-        # Trim old calls
-        if len(self.tool_calls) > self.max_calls:
-            self.tool_calls = self.tool_calls[-self.max_calls:]
+        self._state_cache = None
 
         # Broadcast to websockets
-        asyncio.create_task(self._broadcast({
+        self._enqueue({
             "type": "tool_call",
             "data": call.to_dict(),
-        }))
+        })
 
         return call
 
@@ -102,6 +179,13 @@ class DashboardState:
         else:
             call.status = "success"
             call.result = result
+            call.result_preview = (
+                result[:RESULT_PREVIEW_CHARS]
+                if result and len(result) > RESULT_PREVIEW_CHARS
+                else result
+            )
+        call._dict_cache = None
+        self._state_cache = None
 
         # Track screenshots
         if call.tool_name == "get_screenshot" and result:
@@ -117,48 +201,114 @@ class DashboardState:
             self.recording_active = False
 
         # Broadcast update
-        asyncio.create_task(self._broadcast({
+        self._enqueue({
             "type": "tool_complete",
             "data": call.to_dict(),
-        }))
+        })
 
     def update_device_info(self, info: dict[str, Any]):
         """Update device info."""
         self.device_info = info
-        asyncio.create_task(self._broadcast({
+        self._state_cache = None
+        self._enqueue({
             "type": "device_info",
             "data": info,
-        }))
+        })
 
     def update_wda_status(self, status: dict[str, Any]):
         """Update WDA status."""
         self.wda_status = status
-        asyncio.create_task(self._broadcast({
+        self._state_cache = None
+        self._enqueue({
             "type": "wda_status",
             "data": status,
-        }))
+        })
+
+    def _get_outbox(self) -> asyncio.Queue[dict[str, Any]]:
+        """Get or create the broadcast queue."""
+        if self._outbox is None:
+            self._outbox = asyncio.Queue(maxsize=OUTBOX_MAX_SIZE)
+        return self._outbox
 
-    async def _broadcast(self, message: dict[str, Any]):
-        """Broadcast message to all connected websockets."""
+    def _enqueue(self, message: dict[str, Any]) -> None:
+        """Queue a message for the broadcaster task, dropping the oldest when full."""
+        # Nobody is watching: new clients get the full state on connect anyway
         if not self.websockets:
             return
 
-        msg_str = json.dumps(message)
-        dead_ws = set()
+        outbox = self._get_outbox()
+        try:
+            outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            outbox.get_nowait()
+            outbox.put_nowait(message)
+
+    async def _broadcaster(self) -> None:
+        """Drain the outbox, sending queued messages as batched frames."""
+        outbox = self._get_outbox()
+
+        while True:
+            batch = [await outbox.get()]
+            while len(batch) < BROADCAST_BATCH_SIZE and not outbox.empty():
+                batch.append(outbox.get_nowait())
 
-        for ws in self.websockets:
             try:
-                await ws.send_str(msg_str)
-            except Exception:
-                dead_ws.add(ws)
+                await self._broadcast(batch[0] if len(batch) == 1 else batch)
+            except Exception as e:
+                logger.warning(f"Dashboard broadcast failed: {e}")
+
+    def start_broadcaster(self) -> None:
+        """Start the broadcaster task on the running event loop."""
+        if self._broadcaster_task is None or self._broadcaster_task.done():
+            self._broadcaster_task = asyncio.create_task(self._broadcaster())
+
+    async def stop_broadcaster(self) -> None:
+        """Cancel the broadcaster task."""
+        task = self._broadcaster_task
+        self._broadcaster_task = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _broadcast(self, message: dict[str, Any] | list[dict[str, Any]]):
+        """Broadcast a message (or a batch of messages) to all connected websockets."""
+        if not self.websockets:
+            return
+
+        payload = _json_dumps(message)
+
+        # Send to all clients concurrently so one slow client doesn't stall the rest
+        clients = list(self.websockets)
+        results = await asyncio.gather(
+            *(ws.send_bytes(payload) for ws in clients),
+            return_exceptions=True,
+        )
+        self.websockets.difference_update(
+            ws for ws, res in zip(clients, results) if isinstance(res, BaseException)
+        )
 
-        self.websockets -= dead_ws
+    def get_state_bytes(self) -> bytes:
+        """Get the serialized state, reusing it for a short TTL between mutations."""
+        now = time.monotonic()
+        cached = self._state_cache
+        if cached is not None and now - cached[0] < self._state_cache_ttl:
+            return cached[1]
+
+        payload = _json_dumps(self.get_state())
+        self._state_cache = (now, payload)
+        return payload
 
     def get_state(self) -> dict[str, Any]:
         """Get current state for initial load."""
         return {
             "uptime": time.time() - self.server_start_time,
-            "tool_calls": [c.to_dict() for c in self.tool_calls[-50:]],
+            "tool_calls": [
+                c.to_dict()
+                for c in itertools.islice(self.tool_calls, max(0, len(self.tool_calls) - 50), None)
+            ],
             "device_info": self.device_info,
             "wda_status": self.wda_status,
             "last_screenshot": self.last_screenshot,
@@ -179,46 +329,54 @@ def _load_template() -> str:
     template_path = TEMPLATE_DIR / "dashboard.html"
     return template_path.read_text()
 
-# Cache the template (loaded once at import time)
+# Cache the template (loaded and UTF-8 encoded once at import time)
 DASHBOARD_HTML = _load_template()
+DASHBOARD_HTML_BYTES = DASHBOARD_HTML.encode("utf-8")
 
 
 
 async def handle_index(request: web.Request) -> web.Response:
     """Serve the dashboard HTML."""
-    return web.Response(text=DASHBOARD_HTML, content_type="text/html")
+    return web.Response(body=DASHBOARD_HTML_BYTES, content_type="text/html", charset="utf-8")
 
 
 async def handle_api_state(request: web.Request) -> web.Response:
     """Return current dashboard state as JSON."""
-    return web.json_response(dashboard_state.get_state())
+    return web.Response(body=dashboard_state.get_state_bytes(), content_type="application/json")
+
 
+async def handle_screenshot(request: web.Request) -> web.StreamResponse:
+    """Serve the last screenshot.
 
-async def handle_screenshot(request: web.Request) -> web.Response:
-    """Serve the last screenshot."""
+    The file is streamed with sendfile where available; aiohttp's FileResponse
+    also handles ETag/Last-Modified so unchanged screenshots get a 304.
+    """
     if not dashboard_state.last_screenshot:
         return web.Response(status=404, text="No screenshot available")
 
     path = Path(dashboard_state.last_screenshot)
-    if not path.exists():
+    if not path.is_file():
         return web.Response(status=404, text="Screenshot file not found")
 
     content_type = "image/jpeg" if path.suffix.lower() in [".jpg", ".jpeg"] else "image/png"
-    return web.Response(body=path.read_bytes(), content_type=content_type)
+    return web.FileResponse(
+        path,
+        headers={"Content-Type": content_type, "Cache-Control": "no-cache"},
+    )
 
 
 async def handle_action(request: web.Request) -> web.Response:
     """Execute a quick action (tool call) from the dashboard."""
     try:
-        data = await request.json()
+        data = _json_loads(await request.read())
         tool = data.get("tool")
         args = data.get("args", {})
 
         if not tool:
-            return web.json_response({"success": False, "error": "Missing tool name"}, status=400)
+            return _json_response({"success": False, "error": "Missing tool name"}, status=400)
 
         if not dashboard_state.tool_executor:
-            return web.json_response(
+            return _json_response(
                 {"success": False, "error": "Tool executor not configured"},
                 status=503
             )
@@ -226,17 +384,20 @@ async def handle_action(request: web.Request) -> web.Response:
         # Execute the tool via the callback
         try:
             result = await dashboard_state.tool_executor(tool, args)
-            return web.json_response({"success": True, "result": result})
+            return _json_response({"success": True, "result": result})
         except Exception as e:
             logger.error(f"Tool execution failed: {e}")
-            return web.json_response({"success": False, "error": str(e)}, status=500)
+            return _json_response({"success": False, "error": str(e)}, status=500)
 
     except json.JSONDecodeError:
-        return web.json_response({"success": False, "error": "Invalid JSON"}, status=400)
+        return _json_response({"success": False, "error": "Invalid JSON"}, status=400)
 
 
-async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
+async def handle_websocket(request: web.Request) -> web.StreamResponse:
     """Handle WebSocket connections."""
+    if len(dashboard_state.websockets) >= MAX_WS_CLIENTS:
+        return web.Response(status=503, text="Too many dashboard clients")
+
     ws = web.WebSocketResponse()
     await ws.prepare(request)
 
@@ -244,10 +405,10 @@ async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
     logger.info(f"WebSocket client connected ({len(dashboard_state.websockets)} total)")
 
     # Send initial state
-    await ws.send_json({
+    await ws.send_bytes(_json_dumps({
         "type": "init",
         "data": dashboard_state.get_state(),
-    })
+    }))
 
     try:
         async for msg in ws:
@@ -286,11 +447,13 @@ async def start_dashboard(
             Set `DASHBOARD_AUTO_OPEN=false` to disable.
     """
     app = create_dashboard_app()
-    runner = web.AppRunner(app)
+    # Skip per-request access-log formatting; the dashboard is polled frequently
+    runner = web.AppRunner(app, access_log=None)
     await runner.setup()
 
     site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
+    dashboard_state.start_broadcaster()
 
     url = f"http://localhost:{port}"
     logger.info("Dashboard started at %s", url)
@@ -308,5 +471,6 @@ async def start_dashboard(
 
 async def stop_dashboard(runner: web.AppRunner) -> None:
     """Stop the dashboard server."""
+    await dashboard_state.stop_broadcaster()
     await runner.cleanup()
     logger.info("Dashboard stopped")
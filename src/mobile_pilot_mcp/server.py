@@ -6,24 +6,49 @@ This server uses FastMCP for cleaner decorator-based tool definitions.
 from __future__ import annotations
 
 import asyncio
+import atexit
+import contextlib
+import functools
+import glob
+import io
 import json
 import logging
 import os
+import queue
 import re
-import subprocess
+import shutil
 import sys
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Annotated, Any, Iterator, Literal
+from typing import Annotated, Any, Awaitable, Callable, Iterator, Literal, Sequence
+from urllib.parse import urlsplit
 
+import httpx
+import mcp.types as mt
+import pydantic_core
 from fastmcp import FastMCP
-from pydantic import Field
+from fastmcp.resources import TextResource
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from PIL import Image
+from pydantic import Field, validate_call
+
+try:
+    import orjson
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    orjson = None
+
+try:
+    import psutil
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    psutil = None
 
 from .dashboard import DASHBOARD_PORT, dashboard_state, start_dashboard, stop_dashboard
 from .simulator import SimulatorManager
-from .ui_tree import UITreeParser, find_element_by_predicate
-from .wda_client import WDAClient, WDAError
+from .ui_tree import ElementIndex, UIElement, UITreeParser, find_element_by_predicate
+from .wda_client import WDAClient, WDAError, create_http_client
 
 # Configure logging
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG").upper()
@@ -38,22 +63,57 @@ class FlushingStreamHandler(logging.StreamHandler):
 handler = FlushingStreamHandler(sys.stderr)
 handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
 
+# Records are written to stderr from a background thread, so a flushing write
+# never stalls the event loop in the middle of a tool call.
+_log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+queue_handler = QueueHandler(_log_queue)
+# Only merge args into the message here; the stream handler adds the prefix
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL, logging.DEBUG),
-    handlers=[handler],
+    handlers=[queue_handler],
 )
 logger = logging.getLogger("mobile-pilot-mcp")
 
 # Constants
 SCREENSHOT_DIR = Path("/tmp/mobile-pilot-mcp/screenshots")
 DEFAULT_WDA_PORT = 8100
+MAX_WDA_CLIENTS = 32
+# Devices whose parsed UI trees are kept in memory (least recently used evicted)
+MAX_UI_CACHE_DEVICES = 8
+SCREENSHOT_RESAMPLE = Image.Resampling.LANCZOS
+# How long a fetched UI tree is reused for predicate lookups (seconds)
+UI_SNAPSHOT_TTL = 0.5
 
 # Global state
 simulator_manager = SimulatorManager()
-wda_clients: dict[str, WDAClient] = {}
+# parse() never awaits, so one parser is safely shared by all coroutines
+_ui_parser = UITreeParser()
+# Keep-alive HTTP pool shared by every WDA client (closed in lifespan)
+_http_client: httpx.AsyncClient | None = None
+wda_clients: dict[tuple[str, str, int], WDAClient] = {}
+# Most recently created client per device, for lookups that only know the UDID
+_primary_clients: dict[str, WDAClient] = {}
 _last_ui_elements: dict[str, list] = {}
+# Per-device parse cache: (source fingerprint, only_visible, has_tree, root, elements)
+_parsed_ui_cache: dict[str, tuple[int, bool, bool, UIElement | None, list[UIElement]]] = {}
+# Per-device (monotonic time, index of visible elements) of the last source
+# fetch; dropped after any action that can change the screen
+_ui_snapshots: dict[str, tuple[float, ElementIndex]] = {}
 _recording_paths: dict[str, Path] = {}
-_dashboard_wrapped_tools: set[str] = set()
+_last_file_stamp = 0
+# Output directories already created by this process
+_ensured_dirs: set[Path] = set()
+# Validated tool functions by name, resolved once at startup for dashboard quick actions
+_tool_fn_by_name: dict[str, Callable[..., Awaitable[Any]]] = {}
+
+# Shared parameter type for every tool that targets a simulator
+DeviceId = Annotated[str, Field(description="Simulator UDID")]
 
 # WDA host configuration
 WDA_HOST = os.environ.get("WDA_HOST", "127.0.0.1")
@@ -62,39 +122,170 @@ WDA_HOST = os.environ.get("WDA_HOST", "127.0.0.1")
 # === Helper Functions ===
 
 
+def _get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared WDA HTTP client."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared WDA HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 def get_wda_client(
     device_id: str,
     port: int = DEFAULT_WDA_PORT,
     host: str | None = None,
 ) -> WDAClient:
-    """Get or create a WDA client for a device."""
-    actual_host = host or WDA_HOST
-    key = f"{device_id}:{actual_host}:{port}"
-
-    if key not in wda_clients:
-        wda_clients[key] = WDAClient(host=actual_host, port=port)
-        wda_clients[device_id] = wda_clients[key]
+    """Get or create a WDA client for a device.
 
-    return wda_clients[key]
+    Clients are kept in least-recently-used order and capped at MAX_WDA_CLIENTS;
+    they share one HTTP pool, so evicting one releases no sockets of its own.
+    """
+    key = (device_id, host or WDA_HOST, port)
+    client = wda_clients.pop(key, None)
+    if client is None:
+        client = WDAClient(host=key[1], port=port, http_client=_get_http_client())
+        _primary_clients[device_id] = client
+        if len(wda_clients) >= MAX_WDA_CLIENTS:
+            evicted_key = next(iter(wda_clients))
+            evicted = wda_clients.pop(evicted_key)
+            evicted_device = evicted_key[0]
+            if _primary_clients.get(evicted_device) is evicted:
+                # Promote the most recently used client left for that device, if any
+                remaining = [c for k, c in wda_clients.items() if k[0] == evicted_device]
+                if remaining:
+                    _primary_clients[evicted_device] = remaining[-1]
+                else:
+                    del _primary_clients[evicted_device]
+    wda_clients[key] = client
+    return client
 
 
 async def reset_wda_session(device_id: str) -> None:
-    """Reset WDA session for a device."""
-    client = wda_clients.get(device_id)
-    if client:
-        await client.delete_session()
-        client.session_id = None
+    """Reset WDA sessions, gesture strategy and cached answers on every connection to a device."""
+    for key, client in list(wda_clients.items()):
+        if key[0] == device_id:
+            await client.delete_session()
+            client.reset_strategy()
+            client.clear_cache()
+
+
+def _remember(cache: dict[str, Any], device_id: str, value: Any) -> None:
+    """Store a per-device UI cache entry, evicting the least recently used device."""
+    cache.pop(device_id, None)
+    if len(cache) >= MAX_UI_CACHE_DEVICES:
+        del cache[next(iter(cache))]
+    cache[device_id] = value
+
+
+def _source_fingerprint(source: dict[str, Any] | str) -> int:
+    """Cheap fingerprint of a WDA source dump (C-accelerated, unlike a re-parse)."""
+    if isinstance(source, str):
+        return hash(source)
+    if orjson is not None:
+        return hash(orjson.dumps(source))
+    return hash(json.dumps(source))
+
+
+def _pretty_json(obj: Any) -> str:
+    """Serialize tool output as indented JSON (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def parse_ui_source(
+    device_id: str,
+    source: dict[str, Any] | str,
+    only_visible: bool = True,
+    need_tree: bool = True,
+) -> tuple[UIElement | None, list[UIElement]]:
+    """Parse a WDA source dump, reusing the last parse when the source is unchanged.
+
+    Callers that only use the flat element list pass need_tree=False to skip
+    linking children; a cached parse with the tree serves them as well.
+    """
+    fingerprint = _source_fingerprint(source)
+    cached = _parsed_ui_cache.get(device_id)
+    if (
+        cached is not None
+        and cached[0] == fingerprint
+        and cached[1] == only_visible
+        and (cached[2] or not need_tree)
+    ):
+        _remember(_parsed_ui_cache, device_id, cached)
+        return cached[3], cached[4]
+
+    root, elements = _ui_parser.parse(source, only_visible=only_visible, build_tree=need_tree)
+    _remember(
+        _parsed_ui_cache, device_id, (fingerprint, only_visible, need_tree, root, elements)
+    )
+    return root, elements
+
+
+async def get_ui_index(device_id: str, client: WDAClient) -> ElementIndex:
+    """Return indexed visible elements, refetching the source once the snapshot is stale.
+
+    Scripted flows often look up several predicates back to back; within
+    UI_SNAPSHOT_TTL they share one WDA source round trip and one index.
+    """
+    snapshot = _ui_snapshots.get(device_id)
+    if snapshot is not None and time.monotonic() - snapshot[0] < UI_SNAPSHOT_TTL:
+        return snapshot[1]
+
+    source = await client.get_source(format="json")
+    _, elements = parse_ui_source(device_id, source, need_tree=False)
+    index = ElementIndex(elements)
+    _remember(_ui_snapshots, device_id, (time.monotonic(), index))
+    return index
+
+
+async def find_ui_element(
+    device_id: str, client: WDAClient, predicate: dict[str, Any]
+) -> UIElement | None:
+    """Find the first visible element matching a predicate in the current snapshot."""
+    return find_element_by_predicate(await get_ui_index(device_id, client), predicate)
+
+
+def invalidate_ui_snapshot(device_id: str) -> None:
+    """Forget the cached UI snapshot after an action that may change the screen."""
+    _ui_snapshots.pop(device_id, None)
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory once per process; later calls skip the mkdir syscall."""
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
 
 
 def ensure_screenshot_dir() -> None:
     """Ensure screenshot directory exists."""
-    SCREENSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(SCREENSHOT_DIR)
+
+
+def file_stamp() -> str:
+    """Return a unique, increasing millisecond stamp for output filenames.
+
+    Cheaper than strftime, and never repeats within a process even when
+    several files are written in the same millisecond.
+    """
+    global _last_file_stamp
+    _last_file_stamp = max(time.time_ns() // 1_000_000, _last_file_stamp + 1)
+    return f"{_last_file_stamp:013d}"
 
 
 def save_screenshot(data: bytes, prefix: str = "screenshot") -> str:
     """Save screenshot to file and return path."""
     ensure_screenshot_dir()
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    timestamp = file_stamp()
     filename = f"{prefix}-{timestamp}.png"
     filepath = SCREENSHOT_DIR / filename
     filepath.write_bytes(data)
@@ -111,26 +302,58 @@ def _complete_tool_call(tool_call, result: str | None = None, error: str | None
     dashboard_state.complete_tool_call(tool_call, result=result, error=error)
 
 
-# === Lifespan for Dashboard ===
+def _tool_result_text(result: ToolResult) -> str:
+    """Extract the text content of a tool result for the dashboard."""
+    return "\n".join(
+        block.text for block in result.content if isinstance(block, mt.TextContent)
+    )
+
 
+class DashboardTrackingMiddleware(Middleware):
+    """Record every MCP tool call in the dashboard.
 
-def _wrap_tool_with_tracking(tool_name: str, original_fn):
-    """Wrap a tool function to track calls in the dashboard."""
-    import functools
+    A single middleware hook replaces per-tool function wrapping, so tool
+    functions run unmodified and nothing needs patching at startup.
+    """
 
-    @functools.wraps(original_fn)
-    async def tracked_fn(*args, **kwargs):
-        # Track the call
-        tool_call = _track_tool_call(tool_name, kwargs)
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mt.CallToolRequestParams],
+        call_next: CallNext[mt.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        params = context.message
+        tool_call = _track_tool_call(params.name, dict(params.arguments or {}))
         try:
-            result = await original_fn(*args, **kwargs)
-            _complete_tool_call(tool_call, result=result)
-            return result
+            result = await call_next(context)
         except Exception as e:
             _complete_tool_call(tool_call, error=str(e))
             raise
+        _complete_tool_call(tool_call, result=_tool_result_text(result))
+        return result
+
 
-    return tracked_fn
+async def _call_tool_in_process(name: str, args: dict[str, Any]) -> Any:
+    """Call a registered tool function directly, recording it in the dashboard.
+
+    Used by dashboard quick actions and batch_call, which bypass the MCP
+    middleware chain and so track each call here. Arguments are validated
+    against the tool signature and the result is returned JSON-safe.
+    """
+    fn = _tool_fn_by_name.get(name)
+    if fn is None:
+        raise ValueError(f"Unknown tool: {name}")
+
+    tool_call = _track_tool_call(name, args)
+    try:
+        result = pydantic_core.to_jsonable_python(await fn(**args), fallback=str)
+    except Exception as e:
+        _complete_tool_call(tool_call, error=str(e))
+        raise
+    _complete_tool_call(tool_call, result=result)
+    return result
+
+
+# === Lifespan for Dashboard ===
 
 
 def _iter_named_tools(tools: Any) -> Iterator[tuple[str, Any]]:
@@ -157,31 +380,16 @@ async def lifespan(mcp: FastMCP):
     logger.info(f"Log level: {LOG_LEVEL}")
     logger.info("=" * 60)
 
-    # Wrap all registered tools with dashboard tracking
-    # This makes MCP protocol calls appear in the dashboard
-    tools = await mcp.get_tools()
-    wrapped_count = 0
-    for tool_name, tool in _iter_named_tools(tools):
-        if tool_name in _dashboard_wrapped_tools:
-            continue
+    ensure_screenshot_dir()
 
-        original_fn = tool.fn
-        tool.fn = _wrap_tool_with_tracking(tool_name, original_fn)
-        _dashboard_wrapped_tools.add(tool_name)
-        wrapped_count += 1
-    logger.info(f"Wrapped {wrapped_count} tools with dashboard tracking")
+    # Resolve and wrap tool functions once so quick actions are a plain dict lookup
+    tools = await mcp.get_tools()
+    _tool_fn_by_name.update(
+        (name, validate_call(tool.fn)) for name, tool in _iter_named_tools(tools)
+    )
 
     # Wire up tool executor for dashboard quick actions
-    async def execute_tool_from_dashboard(name: str, args: dict[str, Any]) -> str:
-        """Execute a tool from dashboard quick actions."""
-        # Tools are already wrapped, so just call the function directly.
-        try:
-            tool = await mcp.get_tool(name)
-        except Exception as exc:
-            raise ValueError(f"Unknown tool: {name}") from exc
-        return await tool.fn(**args)
-
-    dashboard_state.tool_executor = execute_tool_from_dashboard
+    dashboard_state.tool_executor = _call_tool_in_process
 
     # Start dashboard server (best-effort).
     # Some MCP runtimes restrict local port binding; the MCP server should
@@ -198,6 +406,7 @@ async def lifespan(mcp: FastMCP):
     finally:
         if dashboard_runner is not None:
             await stop_dashboard(dashboard_runner)
+        await close_http_client()
 
 
 # === Create FastMCP Server ===
@@ -205,6 +414,7 @@ async def lifespan(mcp: FastMCP):
 mcp = FastMCP(
     "mobile-pilot-mcp",
     lifespan=lifespan,
+    middleware=[DashboardTrackingMiddleware()],
 )
 
 
@@ -234,43 +444,46 @@ async def list_devices(
 
 @mcp.tool
 async def get_device(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
 ) -> str:
     """Get information about a specific simulator."""
     device = await simulator_manager.get_device(device_id)
     if not device:
         return f"Device not found: {device_id}"
-    return json.dumps(device.to_dict(), indent=2)
+    return _pretty_json(device.to_dict())
 
 
 @mcp.tool
 async def boot_simulator(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
 ) -> str:
     """Boot an iOS simulator."""
     await simulator_manager.boot(device_id)
+    invalidate_ui_snapshot(device_id)
     await simulator_manager.open_simulator_app()
     return f"Simulator {device_id} booted successfully"
 
 
 @mcp.tool
 async def shutdown_simulator(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
 ) -> str:
     """Shutdown an iOS simulator."""
     await simulator_manager.shutdown(device_id)
+    invalidate_ui_snapshot(device_id)
     return f"Simulator {device_id} shut down successfully"
 
 
 @mcp.tool
 async def start_bridge(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     port: Annotated[int, Field(description="WDA port")] = DEFAULT_WDA_PORT,
     host: Annotated[str | None, Field(description="WDA host (default: WDA_HOST env var)")] = None,
 ) -> str:
     """Check WebDriverAgent connection (WDA must be running separately via xcodebuild)."""
     actual_host = host or WDA_HOST
     client = get_wda_client(device_id, port, actual_host)
+    invalidate_ui_snapshot(device_id)
 
     if await client.health_check():
         await client.create_session()
@@ -307,58 +520,105 @@ async def start_bridge(
 # === Screenshot ===
 
 
-@mcp.tool
-async def get_screenshot(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
-    scale: Annotated[float, Field(description="Scale factor 0.1-1.0")] = 0.5,
-    format: Annotated[Literal["png", "jpeg"], Field(description="Image format")] = "jpeg",
-    quality: Annotated[int, Field(ge=1, le=100, description="JPEG quality 1-100")] = 85,
-) -> str:
-    """Capture a screenshot from the simulator with resizing and format options."""
-    from PIL import Image
+def _process_screenshot(
+    data: bytes,
+    timestamp: str,
+    rotation: Any,
+    scale: float,
+    format: str,
+    quality: int,
+) -> tuple[Path, tuple[int, int], int, tuple[int, int], int]:
+    """Rotate, resize and re-encode raw simctl PNG bytes.
 
-    ensure_screenshot_dir()
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    temp_filepath = SCREENSHOT_DIR / f"temp-{timestamp}.png"
-    await simulator_manager.screenshot(device_id, temp_filepath)
-
-    with Image.open(temp_filepath) as img:
-        # Fix landscape screenshots: simctl captures the raw framebuffer
-        # in portrait orientation, so landscape content appears rotated.
-        if img.height > img.width:
-            try:
-                client = wda_clients.get(device_id)
-                if client:
-                    orientation = (await client.get_orientation()).upper()
-                    if orientation in ("LANDSCAPE", "LANDSCAPE_LEFT"):
-                        img = img.transpose(Image.Transpose.ROTATE_90)
-                    elif orientation == "LANDSCAPE_RIGHT":
-                        img = img.transpose(Image.Transpose.ROTATE_270)
-            except Exception as e:
-                logger.debug("Could not query orientation for rotation: %s", e)
+    This is CPU-bound Pillow work, so callers run it in a worker thread.
+
+    Returns:
+        Tuple of (output path, original size, original file size, new size, new file size)
+    """
+    needs_resize = bool(scale and scale < 1.0)
+
+    # simctl already produces a PNG: when no rotation or resize is needed,
+    # re-encoding it would only burn CPU, so write the bytes out as-is.
+    if format == "png" and rotation is None and not needs_resize:
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+        filepath = SCREENSHOT_DIR / f"screenshot-{timestamp}.png"
+        filepath.write_bytes(data)
+        return filepath, size, len(data), size, len(data)
+
+    with Image.open(io.BytesIO(data)) as img:
+        if rotation is not None:
+            img = img.transpose(rotation)
 
         original_size = img.size
-        original_file_size = temp_filepath.stat().st_size
+        original_file_size = len(data)
 
-        if scale and scale < 1.0:
+        # Flatten alpha before resizing: resampling three bands instead of
+        # four is noticeably cheaper than compositing the smaller image later.
+        if format == "jpeg" and img.mode == "RGBA":
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[3])
+            img = background
+
+        if needs_resize:
             new_size = (int(img.width * scale), int(img.height * scale))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+            img = img.resize(new_size, SCREENSHOT_RESAMPLE)
 
         if format == "jpeg":
-            if img.mode == "RGBA":
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])
-                img = background
+            # Skip the Huffman-optimization pass (a few % size for a full extra
+            # encode pass); 4:2:0 chroma subsampling is invisible on UI captures.
             filepath = SCREENSHOT_DIR / f"screenshot-{timestamp}.jpg"
-            img.save(filepath, "JPEG", quality=quality, optimize=True)
+            img.save(filepath, "JPEG", quality=quality, optimize=False, subsampling=2)
         else:
+            # Fast deflate: optimize=True retries every filter at level 9
             filepath = SCREENSHOT_DIR / f"screenshot-{timestamp}.png"
-            img.save(filepath, "PNG", optimize=True)
+            img.save(filepath, "PNG", compress_level=1)
 
         new_file_size = filepath.stat().st_size
         new_size = img.size
 
-    temp_filepath.unlink(missing_ok=True)
+    return filepath, original_size, original_file_size, new_size, new_file_size
+
+
+@mcp.tool
+async def get_screenshot(
+    device_id: DeviceId,
+    scale: Annotated[float, Field(description="Scale factor 0.1-1.0")] = 0.5,
+    format: Annotated[Literal["png", "jpeg"], Field(description="Image format")] = "jpeg",
+    quality: Annotated[int, Field(ge=1, le=100, description="JPEG quality 1-100")] = 85,
+) -> str:
+    """Capture a screenshot from the simulator with resizing and format options."""
+    ensure_screenshot_dir()
+    timestamp = file_stamp()
+    data = await simulator_manager.screenshot_bytes(device_id)
+
+    # Fix landscape screenshots: simctl captures the raw framebuffer
+    # in portrait orientation, so landscape content appears rotated.
+    # Image.open only reads the header here, so this is cheap.
+    rotation = None
+    with Image.open(io.BytesIO(data)) as img:
+        is_portrait = img.height > img.width
+    if is_portrait:
+        try:
+            client = _primary_clients.get(device_id)
+            if client:
+                orientation = (await client.get_orientation()).upper()
+                if orientation in ("LANDSCAPE", "LANDSCAPE_LEFT"):
+                    rotation = Image.Transpose.ROTATE_90
+                elif orientation == "LANDSCAPE_RIGHT":
+                    rotation = Image.Transpose.ROTATE_270
+        except Exception as e:
+            logger.debug("Could not query orientation for rotation: %s", e)
+
+    (
+        filepath,
+        original_size,
+        original_file_size,
+        new_size,
+        new_file_size,
+    ) = await asyncio.to_thread(
+        _process_screenshot, data, timestamp, rotation, scale, format, quality
+    )
     reduction = ((original_file_size - new_file_size) / original_file_size) * 100
 
     return (
@@ -374,7 +634,7 @@ async def get_screenshot(
 
 @mcp.tool
 async def get_ui_tree(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     verbose: Annotated[bool, Field(description="Include element bounds")] = False,
     only_visible: Annotated[bool, Field(description="Only visible elements")] = True,
     format: Annotated[Literal["tree", "flat", "json"], Field(description="Output format")] = "tree",
@@ -383,20 +643,23 @@ async def get_ui_tree(
     client = get_wda_client(device_id)
     source = await client.get_source(format="json")
 
-    parser = UITreeParser()
-    root, elements = parser.parse(source, only_visible=only_visible)
+    root, elements = parse_ui_source(
+        device_id, source, only_visible=only_visible, need_tree=format == "tree"
+    )
 
     if not root:
         return "No UI elements found"
 
-    _last_ui_elements[device_id] = elements
+    _remember(_last_ui_elements, device_id, elements)
+    if only_visible:
+        _remember(_ui_snapshots, device_id, (time.monotonic(), ElementIndex(elements)))
 
     if format == "json":
-        return json.dumps([e.to_dict(include_children=False) for e in elements], indent=2)
+        return _pretty_json([e.to_dict(include_children=False) for e in elements])
     elif format == "flat":
-        return parser.format_flat_list(elements, verbose=verbose)
+        return _ui_parser.format_flat_list(elements, verbose=verbose)
     else:
-        return parser.format_tree(root, elements, verbose=verbose)
+        return _ui_parser.format_tree(root, elements, verbose=verbose)
 
 
 # === Tap ===
@@ -404,7 +667,7 @@ async def get_ui_tree(
 
 @mcp.tool
 async def tap(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     index: Annotated[int | None, Field(description="Element index from UI tree")] = None,
     x: Annotated[int | None, Field(description="X coordinate")] = None,
     y: Annotated[int | None, Field(description="Y coordinate")] = None,
@@ -417,27 +680,24 @@ async def tap(
         elements = _last_ui_elements.get(device_id, [])
         if not elements:
             source = await client.get_source(format="json")
-            parser = UITreeParser()
-            _, elements = parser.parse(source, only_visible=True)
-            _last_ui_elements[device_id] = elements
+            _, elements = parse_ui_source(device_id, source, need_tree=False)
+            _remember(_last_ui_elements, device_id, elements)
 
         if index >= len(elements):
             return f"Invalid index {index}. Max index is {len(elements) - 1}"
 
         elem = elements[index]
         await client.tap(elem.center_x, elem.center_y)
+        invalidate_ui_snapshot(device_id)
         return f"Tapped element [{index}] {elem.element_type} at ({elem.center_x}, {elem.center_y})"
 
     elif predicate:
-        source = await client.get_source(format="json")
-        parser = UITreeParser()
-        _, elements = parser.parse(source, only_visible=True)
-
-        elem = find_element_by_predicate(elements, predicate)
+        elem = await find_ui_element(device_id, client, predicate)
         if not elem:
             return f"No element found matching predicate: {predicate}"
 
         await client.tap(elem.center_x, elem.center_y)
+        invalidate_ui_snapshot(device_id)
         return (
             f"Tapped element [{elem.index}] {elem.element_type} "
             f"at ({elem.center_x}, {elem.center_y})"
@@ -445,6 +705,7 @@ async def tap(
 
     elif x is not None and y is not None:
         await client.tap(x, y)
+        invalidate_ui_snapshot(device_id)
         return f"Tapped at ({x}, {y})"
 
     else:
@@ -456,7 +717,7 @@ async def tap(
 
 @mcp.tool
 async def type_text(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     text: Annotated[str, Field(description="Text to type")],
     predicate: Annotated[dict[str, Any] | None, Field(description="Tap element first")] = None,
 ) -> str:
@@ -464,27 +725,42 @@ async def type_text(
     client = get_wda_client(device_id)
 
     if predicate:
-        source = await client.get_source(format="json")
-        parser = UITreeParser()
-        _, elements = parser.parse(source, only_visible=True)
-
-        elem = find_element_by_predicate(elements, predicate)
+        elem = await find_ui_element(device_id, client, predicate)
         if not elem:
             return f"No element found matching predicate: {predicate}"
 
         await client.tap(elem.center_x, elem.center_y)
-        await asyncio.sleep(0.3)
+        # Bounded by the old fixed delay: with a hardware keyboard attached the
+        # on-screen one never appears, and typing must not wait any longer.
+        await client.wait_for_keyboard(timeout=0.3)
 
     await client.send_keys(text)
+    invalidate_ui_snapshot(device_id)
     return f"Typed: {text}"
 
 
 # === Swipe ===
 
 
+@functools.lru_cache(maxsize=64)
+def _swipe_points(direction: str, width: int, height: int) -> tuple[int, int, int, int]:
+    """Return (from_x, from_y, to_x, to_y) for a directional swipe across the screen center."""
+    center_x = width // 2
+    center_y = height // 2
+    distance = min(width, height) // 3
+
+    if direction == "up":
+        return center_x, center_y + distance, center_x, center_y - distance
+    if direction == "down":
+        return center_x, center_y - distance, center_x, center_y + distance
+    if direction == "left":
+        return center_x + distance, center_y, center_x - distance, center_y
+    return center_x - distance, center_y, center_x + distance, center_y
+
+
 @mcp.tool
 async def swipe(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     from_x: Annotated[int | None, Field(description="Starting X coordinate")] = None,
     from_y: Annotated[int | None, Field(description="Starting Y coordinate")] = None,
     to_x: Annotated[int | None, Field(description="Ending X coordinate")] = None,
@@ -499,30 +775,17 @@ async def swipe(
     client = get_wda_client(device_id)
 
     if direction:
+        # WDAClient caches the size briefly and drops it when the orientation changes
         size = await client.get_window_size()
-        width = size.get("width", 390)
-        height = size.get("height", 844)
-        center_x = width // 2
-        center_y = height // 2
-        distance = min(width, height) // 3
-
-        if direction == "up":
-            from_x, from_y = center_x, center_y + distance
-            to_x, to_y = center_x, center_y - distance
-        elif direction == "down":
-            from_x, from_y = center_x, center_y - distance
-            to_x, to_y = center_x, center_y + distance
-        elif direction == "left":
-            from_x, from_y = center_x + distance, center_y
-            to_x, to_y = center_x - distance, center_y
-        elif direction == "right":
-            from_x, from_y = center_x - distance, center_y
-            to_x, to_y = center_x + distance, center_y
+        from_x, from_y, to_x, to_y = _swipe_points(
+            direction, size.get("width", 390), size.get("height", 844)
+        )
 
     if from_x is None or from_y is None or to_x is None or to_y is None:
         return "Please provide direction or from_x, from_y, to_x, to_y"
 
     await client.swipe(from_x, from_y, to_x, to_y, duration_ms / 1000.0)
+    invalidate_ui_snapshot(device_id)
     return f"Swiped from ({from_x}, {from_y}) to ({to_x}, {to_y})"
 
 
@@ -530,16 +793,17 @@ async def swipe(
 
 
 @mcp.tool
-async def go_home(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def go_home(device_id: DeviceId) -> str:
     """Navigate to home screen."""
     client = get_wda_client(device_id)
     await client.go_home()
+    invalidate_ui_snapshot(device_id)
     return "Navigated to home screen"
 
 
 @mcp.tool
 async def launch_app(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     bundle_id: Annotated[str, Field(description="App bundle ID (e.g., com.apple.Preferences)")],
 ) -> str:
     """Launch an application by bundle ID."""
@@ -548,13 +812,14 @@ async def launch_app(
         await client.launch_app(bundle_id)
     except WDAError:
         await simulator_manager.launch_app(device_id, bundle_id)
+    invalidate_ui_snapshot(device_id)
 
     return f"Launched app: {bundle_id}"
 
 
 @mcp.tool
 async def terminate_app(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     bundle_id: Annotated[str, Field(description="App bundle ID")],
 ) -> str:
     """Terminate an application."""
@@ -563,12 +828,13 @@ async def terminate_app(
         await client.terminate_app(bundle_id)
     except WDAError:
         await simulator_manager.terminate_app(device_id, bundle_id)
+    invalidate_ui_snapshot(device_id)
 
     return f"Terminated app: {bundle_id}"
 
 
 @mcp.tool
-async def list_apps(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def list_apps(device_id: DeviceId) -> str:
     """List installed applications on the simulator."""
     apps = await simulator_manager.list_apps(device_id)
     if not apps:
@@ -584,17 +850,18 @@ async def list_apps(device_id: Annotated[str, Field(description="Simulator UDID"
 
 @mcp.tool
 async def open_url(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     url: Annotated[str, Field(description="URL to open")],
 ) -> str:
     """Open a URL in the simulator (opens in Safari or associated app)."""
     await simulator_manager.open_url(device_id, url)
+    invalidate_ui_snapshot(device_id)
     return f"Opened URL: {url}"
 
 
 @mcp.tool
 async def press_button(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     button: Annotated[
         Literal["home", "volumeUp", "volumeDown"],
         Field(description="Button to press"),
@@ -603,17 +870,19 @@ async def press_button(
     """Press a hardware button (home, volumeUp, volumeDown)."""
     client = get_wda_client(device_id)
     await client.press_button(button)
+    invalidate_ui_snapshot(device_id)
     return f"Pressed button: {button}"
 
 
 @mcp.tool
 async def set_location(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     latitude: Annotated[float, Field(description="Latitude coordinate")],
     longitude: Annotated[float, Field(description="Longitude coordinate")],
 ) -> str:
     """Set the simulator's GPS location."""
     await simulator_manager.set_location(device_id, latitude, longitude)
+    invalidate_ui_snapshot(device_id)
     return f"Location set to ({latitude}, {longitude})"
 
 
@@ -621,7 +890,7 @@ async def set_location(
 
 
 @mcp.tool
-async def get_clipboard(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def get_clipboard(device_id: DeviceId) -> str:
     """Get clipboard/pasteboard content."""
     client = get_wda_client(device_id)
     content = await client.get_pasteboard()
@@ -630,7 +899,7 @@ async def get_clipboard(device_id: Annotated[str, Field(description="Simulator U
 
 @mcp.tool
 async def set_clipboard(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     content: Annotated[str, Field(description="Content to set")],
 ) -> str:
     """Set clipboard/pasteboard content."""
@@ -643,7 +912,7 @@ async def set_clipboard(
 
 
 @mcp.tool
-async def get_window_size(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def get_window_size(device_id: DeviceId) -> str:
     """Get the simulator window/screen size."""
     client = get_wda_client(device_id)
     size = await client.get_window_size()
@@ -655,19 +924,20 @@ async def get_window_size(device_id: Annotated[str, Field(description="Simulator
 
 @mcp.tool
 async def double_tap(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     x: Annotated[int, Field(description="X coordinate")],
     y: Annotated[int, Field(description="Y coordinate")],
 ) -> str:
     """Double tap at coordinates."""
     client = get_wda_client(device_id)
     await client.double_tap(x, y)
+    invalidate_ui_snapshot(device_id)
     return f"Double tapped at ({x}, {y})"
 
 
 @mcp.tool
 async def long_press(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     x: Annotated[int, Field(description="X coordinate")],
     y: Annotated[int, Field(description="Y coordinate")],
     duration: Annotated[float, Field(description="Duration in seconds")] = 1.0,
@@ -675,6 +945,7 @@ async def long_press(
     """Long press at coordinates."""
     client = get_wda_client(device_id)
     await client.long_press(x, y, duration)
+    invalidate_ui_snapshot(device_id)
     return f"Long pressed at ({x}, {y}) for {duration}s"
 
 
@@ -682,23 +953,25 @@ async def long_press(
 
 
 @mcp.tool
-async def accept_alert(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def accept_alert(device_id: DeviceId) -> str:
     """Accept the current alert dialog."""
     client = get_wda_client(device_id)
     await client.accept_alert()
+    invalidate_ui_snapshot(device_id)
     return "Alert accepted"
 
 
 @mcp.tool
-async def dismiss_alert(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def dismiss_alert(device_id: DeviceId) -> str:
     """Dismiss the current alert dialog."""
     client = get_wda_client(device_id)
     await client.dismiss_alert()
+    invalidate_ui_snapshot(device_id)
     return "Alert dismissed"
 
 
 @mcp.tool
-async def get_alert_text(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def get_alert_text(device_id: DeviceId) -> str:
     """Get the text of the current alert dialog."""
     client = get_wda_client(device_id)
     text = await client.get_alert_text()
@@ -712,15 +985,16 @@ async def get_alert_text(device_id: Annotated[str, Field(description="Simulator
 
 
 @mcp.tool
-async def reset_session(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def reset_session(device_id: DeviceId) -> str:
     """Reset the WDA session (useful if session expires or has errors)."""
+    client = _primary_clients.get(device_id) or get_wda_client(device_id)
+    # Other connections to the same simulator would otherwise keep a dead session
     await reset_wda_session(device_id)
-    client = get_wda_client(device_id)
-    if await client.health_check():
-        await client.create_session()
-        return f"Session reset. New session created (ID: {client.session_id})."
-    else:
-        return "Session reset, but WDA is not responding. Please restart WDA."
+    result = await client.reset_and_create_session()
+    invalidate_ui_snapshot(device_id)
+    if result["status"] == "ok":
+        return f"Session reset. New session created (ID: {result['session_id']})."
+    return "Session reset, but WDA is not responding. Please restart WDA."
 
 
 # === Status Bar ===
@@ -728,7 +1002,7 @@ async def reset_session(device_id: Annotated[str, Field(description="Simulator U
 
 @mcp.tool
 async def set_status_bar(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     time: Annotated[str | None, Field(description="Time string (e.g., '9:41')")] = None,
     battery_level: Annotated[
         int | None,
@@ -756,18 +1030,20 @@ async def set_status_bar(
     operator_name: Annotated[str | None, Field(description="Carrier name (empty to hide)")] = None,
 ) -> str:
     """Override status bar appearance for consistent screenshots."""
-    overrides = [
-        time,
-        battery_level,
-        battery_state,
-        data_network,
-        wifi_mode,
-        wifi_bars,
-        cellular_mode,
-        cellular_bars,
-        operator_name,
-    ]
-    if all(v is None for v in overrides):
+    # (label, display value) per override; None means "leave unchanged"
+    fields = (
+        ("time", time),
+        ("battery", None if battery_level is None else f"{battery_level}%"),
+        ("battery_state", battery_state),
+        ("network", data_network),
+        ("wifi", wifi_mode),
+        ("wifi_bars", wifi_bars),
+        ("cellular", cellular_mode),
+        ("cellular_bars", cellular_bars),
+        ("operator", None if operator_name is None else operator_name or "(hidden)"),
+    )
+    changes = ", ".join(f"{label}={value}" for label, value in fields if value is not None)
+    if not changes:
         raise ValueError("At least one status bar override must be specified")
 
     await simulator_manager.status_bar_override(
@@ -782,34 +1058,45 @@ async def set_status_bar(
         cellular_bars=cellular_bars,
         operator_name=operator_name,
     )
+    invalidate_ui_snapshot(device_id)
+
+    return f"Status bar updated: {changes}"
 
-    changes = []
-    if time is not None:
-        changes.append(f"time={time}")
-    if battery_level is not None:
-        changes.append(f"battery={battery_level}%")
-    if battery_state is not None:
-        changes.append(f"battery_state={battery_state}")
-    if data_network is not None:
-        changes.append(f"network={data_network}")
-    if wifi_mode is not None:
-        changes.append(f"wifi={wifi_mode}")
-    if wifi_bars is not None:
-        changes.append(f"wifi_bars={wifi_bars}")
-    if cellular_mode is not None:
-        changes.append(f"cellular={cellular_mode}")
-    if cellular_bars is not None:
-        changes.append(f"cellular_bars={cellular_bars}")
-    if operator_name is not None:
-        changes.append(f"operator={operator_name or '(hidden)'}")
-
-    return f"Status bar updated: {', '.join(changes)}"
+
+# Validates merged batch overrides against set_status_bar's own field constraints
+_validated_set_status_bar = validate_call(set_status_bar.fn)
+_STATUS_BAR_FIELDS = frozenset(set_status_bar.parameters["properties"]) - {"device_id"}
 
 
 @mcp.tool
-async def clear_status_bar(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def set_status_bar_batch(
+    device_id: DeviceId,
+    overrides: Annotated[
+        list[dict[str, Any]],
+        Field(
+            min_length=1,
+            description="List of set_status_bar override dicts, merged in order "
+            "(later keys win), e.g. [{'time': '9:41'}, {'battery_level': 100}]",
+        ),
+    ],
+) -> str:
+    """Apply several status bar overrides with a single simctl call."""
+    merged: dict[str, Any] = {}
+    for override in overrides:
+        merged.update(override)
+
+    unknown = sorted(set(merged) - _STATUS_BAR_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown status bar override(s): {', '.join(unknown)}")
+
+    return await _validated_set_status_bar(device_id, **merged)
+
+
+@mcp.tool
+async def clear_status_bar(device_id: DeviceId) -> str:
     """Clear all status bar overrides and return to normal."""
     await simulator_manager.status_bar_clear(device_id)
+    invalidate_ui_snapshot(device_id)
     return "Status bar overrides cleared"
 
 
@@ -817,10 +1104,11 @@ async def clear_status_bar(device_id: Annotated[str, Field(description="Simulato
 
 
 @mcp.tool
-async def dismiss_keyboard(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def dismiss_keyboard(device_id: DeviceId) -> str:
     """Dismiss the on-screen keyboard if visible."""
     client = get_wda_client(device_id)
     await client.dismiss_keyboard()
+    invalidate_ui_snapshot(device_id)
     return "Keyboard dismissed"
 
 
@@ -829,17 +1117,18 @@ async def dismiss_keyboard(device_id: Annotated[str, Field(description="Simulato
 
 @mcp.tool
 async def set_appearance(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     appearance: Annotated[Literal["dark", "light"], Field(description="Appearance mode to set")],
 ) -> str:
     """Set device appearance (dark mode or light mode)."""
     client = get_wda_client(device_id)
     await client.set_appearance(appearance)
+    invalidate_ui_snapshot(device_id)
     return f"Appearance set to: {appearance}"
 
 
 @mcp.tool
-async def get_appearance(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def get_appearance(device_id: DeviceId) -> str:
     """Get current device appearance (dark/light mode)."""
     client = get_wda_client(device_id)
     appearance = await client.get_appearance()
@@ -851,7 +1140,7 @@ async def get_appearance(device_id: Annotated[str, Field(description="Simulator
 
 @mcp.tool
 async def simulate_biometrics(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     match: Annotated[
         bool,
         Field(description="True for successful authentication, False for failure"),
@@ -860,6 +1149,7 @@ async def simulate_biometrics(
     """Simulate Touch ID or Face ID authentication (success or failure)."""
     client = get_wda_client(device_id)
     await client.simulate_biometrics(match=match)
+    invalidate_ui_snapshot(device_id)
     result = "successful" if match else "failed"
     return f"Simulated biometric authentication: {result}"
 
@@ -869,17 +1159,16 @@ async def simulate_biometrics(
 
 @mcp.tool
 async def start_recording(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     codec: Annotated[Literal["hevc", "h264"], Field(description="Video codec")] = "hevc",
 ) -> str:
     """Start screen recording. Use stop_recording to save the video (.mov file)."""
     if simulator_manager.is_recording(device_id):
         return "Recording already in progress. Use stop_recording first."
 
-    ensure_screenshot_dir()
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    timestamp = file_stamp()
     video_dir = SCREENSHOT_DIR.parent / "recordings"
-    video_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(video_dir)
     filepath = video_dir / f"recording-{timestamp}.mov"
 
     _recording_paths[device_id] = filepath
@@ -889,7 +1178,7 @@ async def start_recording(
 
 
 @mcp.tool
-async def stop_recording(device_id: Annotated[str, Field(description="Simulator UDID")]) -> str:
+async def stop_recording(device_id: DeviceId) -> str:
     """Stop screen recording and save the video file."""
     if not simulator_manager.is_recording(device_id):
         return "No recording in progress"
@@ -897,13 +1186,17 @@ async def stop_recording(device_id: Annotated[str, Field(description="Simulator
     filepath = _recording_paths.pop(device_id, None)
     stopped = await simulator_manager.stop_recording(device_id)
 
-    if stopped and filepath and filepath.exists():
-        file_size = filepath.stat().st_size / 1024
-        return f"Screen recording saved: {filepath}\nSize: {file_size:.1f}KB"
-    elif stopped:
-        return "Recording stopped but file may still be processing"
-    else:
+    if not stopped:
         return "No recording was in progress"
+    if filepath is not None:
+        # A single stat both checks that the file exists and reads its size
+        try:
+            file_size = filepath.stat().st_size / 1024
+        except FileNotFoundError:
+            pass
+        else:
+            return f"Screen recording saved: {filepath}\nSize: {file_size:.1f}KB"
+    return "Recording stopped but file may still be processing"
 
 
 # === Pinch Gesture ===
@@ -911,7 +1204,7 @@ async def stop_recording(device_id: Annotated[str, Field(description="Simulator
 
 @mcp.tool
 async def pinch(
-    device_id: Annotated[str, Field(description="Simulator UDID")],
+    device_id: DeviceId,
     x: Annotated[int, Field(description="Center X coordinate for pinch")],
     y: Annotated[int, Field(description="Center Y coordinate for pinch")],
     scale: Annotated[float, Field(description="Scale factor: <1.0 to zoom out, >1.0 to zoom in")],
@@ -923,6 +1216,7 @@ async def pinch(
     """Perform a pinch gesture (zoom in/out) at coordinates."""
     client = get_wda_client(device_id)
     await client.pinch(x, y, scale, velocity)
+    invalidate_ui_snapshot(device_id)
 
     action = "zoom in" if scale > 1.0 else "zoom out"
     return f"Pinch gesture at ({x}, {y}) with scale {scale} ({action})"
@@ -930,179 +1224,371 @@ async def pinch(
 
 # === DTD Discovery ===
 
+# A trailing "ws" path segment is dropped by _normalize_dtd_match, so the
+# pattern needs no optional tail for it.
+_DTD_URI_RE = re.compile(r"(?:ws|http)s?://(?:127\.0\.0\.1|localhost):\d+/[A-Za-z0-9+/]+=*/?")
+_LSOF_PORT_RE = re.compile(r":(\d+)\s*$")
+
+
+def _is_dart_line(line: str) -> bool:
+    """Whether a process-table or lsof line belongs to a Dart or Flutter process.
+
+    One lower() plus two substring scans measures ~10x faster in CPython than
+    a case-insensitive regex search (with or without explicit char classes).
+    """
+    lower_line = line.lower()
+    return "dart" in lower_line or "flutter" in lower_line
+
+
+def _normalize_dtd_match(match: str) -> tuple[str, str]:
+    """Turn a matched VM service URI into its (ws_uri, http_uri) pair."""
+    scheme, _, authority_path = match.partition("://")
+    authority_path = authority_path.rstrip("/")
+    if authority_path.endswith("/ws"):
+        authority_path = authority_path[:-3]
+    if not authority_path.endswith("="):
+        authority_path += "="
+
+    if scheme in ("https", "wss"):
+        return f"wss://{authority_path}/ws", f"https://{authority_path}/"
+    return f"ws://{authority_path}/ws", f"http://{authority_path}/"
+
+
+# Hard caps so a noisy machine cannot blow up discovery time or memory
+MAX_DISCOVERED = 64
+MAX_PROBED_PORTS = 32
+
+# Successful discovery results are reused briefly so repeated calls are free
+DTD_DISCOVERY_CACHE_TTL = 5.0
+_last_discovery: tuple[float, str] | None = None
+
+# (ws_uri, http_uri, process, vm_name) as reported by a discovery step
+DTDEntry = tuple[str, str, str, str]
+
+# Parsed Flutter state files by path: (st_mtime_ns, st_size, entries)
+_state_file_cache: dict[str, tuple[int, int, list[DTDEntry]]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _command_available(name: str) -> bool:
+    """Whether a discovery command exists on this host (resolved once per name)."""
+    if name == "log" and sys.platform != "darwin":
+        # macOS unified logging; some Linux distros ship an unrelated `log`
+        return False
+    return shutil.which(name) is not None
+
+
+async def _stream_command_lines(
+    cmd: Sequence[str], on_line: Callable[[str], bool | None], timeout: float
+) -> None:
+    """Feed a discovery command's stdout to on_line as it streams.
+
+    Output is never buffered whole. The command is killed as soon as on_line
+    returns True or the timeout passes; lines seen before that still count.
+    Commands missing on this host are skipped without spawning anything.
+    """
+    if not _command_available(cmd[0]):
+        logger.debug("Skipping %s: not available on this host", cmd[0])
+        return
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=1 << 20,
+    )
+
+    async def pump() -> None:
+        async for raw_line in proc.stdout:
+            if on_line(raw_line.decode("utf-8", errors="replace")):
+                return
+
+    try:
+        await asyncio.wait_for(pump(), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.debug("%s timed out after %ss", cmd[0], timeout)
+    finally:
+        if proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+        await proc.wait()
+
+
+def _read_process_table() -> list[DTDEntry]:
+    """Collect VM service URIs from dart/flutter command lines via psutil (blocking)."""
+    entries: list[DTDEntry] = []
+    for proc in psutil.process_iter(["cmdline"]):
+        cmdline = proc.info["cmdline"]
+        if not cmdline:
+            continue
+        line = " ".join(cmdline)
+        if _is_dart_line(line):
+            for match in _DTD_URI_RE.finditer(line):
+                entries.append((*_normalize_dtd_match(match.group()), cmdline[0], ""))
+            if len(entries) >= MAX_DISCOVERED:
+                break
+    return entries
+
+
+async def _scan_process_list() -> list[DTDEntry]:
+    """Step 1: Look for VM service URIs in process command lines."""
+    if psutil is not None:
+        return await asyncio.to_thread(_read_process_table)
+
+    entries: list[DTDEntry] = []
+
+    def on_line(line: str) -> bool:
+        if _is_dart_line(line):
+            for match in _DTD_URI_RE.finditer(line):
+                parts = line.split()
+                process_name = parts[10] if len(parts) > 10 else "dart"
+                entries.append((*_normalize_dtd_match(match.group()), process_name, ""))
+        return len(entries) >= MAX_DISCOVERED
+
+    await _stream_command_lines(("ps", "aux"), on_line, timeout=10)
+    return entries
+
+
+def _iter_files_with_stat(directory: str) -> Iterator[tuple[str, os.stat_result]]:
+    """Yield (path, stat) for the regular files in a directory (skips non-directories)."""
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+
+def _read_flutter_state_files() -> list[DTDEntry]:
+    """Collect VM service URIs from Flutter tool state files (blocking I/O)."""
+    flutter_state_patterns = [
+        str(Path.home() / ".flutter_tool_state"),
+        "/tmp/flutter_tools.*",
+    ]
+
+    global _state_file_cache
+    previous_cache = _state_file_cache
+    current_cache: dict[str, tuple[int, int, list[DTDEntry]]] = {}
+    entries: list[DTDEntry] = []
+    for pattern in flutter_state_patterns:
+        for state_dir in glob.glob(pattern):
+            for filepath, st in _iter_files_with_stat(state_dir):
+                cached = previous_cache.get(filepath)
+                if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                    file_entries = cached[2]
+                else:
+                    try:
+                        with open(filepath) as f:
+                            content = f.read()
+                    except Exception:
+                        continue
+                    file_entries = [
+                        (*_normalize_dtd_match(match.group()), "flutter (from state file)", "")
+                        for match in _DTD_URI_RE.finditer(content)
+                    ]
+                current_cache[filepath] = (st.st_mtime_ns, st.st_size, file_entries)
+                entries.extend(file_entries)
+
+    # Only files seen in this scan are kept, so deleted state files drop out
+    _state_file_cache = current_cache
+    return entries
+
+
+async def _scan_flutter_state_files() -> list[DTDEntry]:
+    """Step 2: Check Flutter tool state files, off the event loop."""
+    return await asyncio.to_thread(_read_flutter_state_files)
+
+
+async def _list_dart_listening_ports() -> list[tuple[int, str]]:
+    """Step 3a: Find dart processes with listening TCP ports."""
+    candidate_ports: list[tuple[int, str]] = []
+
+    def on_line(line: str) -> bool:
+        if _is_dart_line(line):
+            match = _LSOF_PORT_RE.search(line)
+            if match:
+                port = int(match.group(1))
+                parts = line.split()
+                process_name = parts[0] if parts else "unknown"
+                candidate_ports.append((port, process_name))
+        return len(candidate_ports) >= MAX_PROBED_PORTS
+
+    await _stream_command_lines(_LSOF_LISTEN_CMD, on_line, timeout=10)
+    return candidate_ports
+
+
+_LSOF_LISTEN_CMD = ("lsof", "-iTCP", "-sTCP:LISTEN", "-n", "-P")
+_GET_VM_REQUEST = b"GET /getVM HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n"
+
+
+def _decode_chunked(body: bytes) -> bytes:
+    """Decode an HTTP/1.1 chunked transfer-encoded body."""
+    decoded = bytearray()
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line.split(b";", 1)[0], 16)
+        if size == 0:
+            break
+        decoded += body[:size]
+        body = body[size + 2:]
+    return bytes(decoded)
+
+
+async def _fetch_vm_info(port: int) -> dict[str, Any] | None:
+    """GET /getVM from a loopback port with a bare HTTP/1.1 request."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(_GET_VM_REQUEST)
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, _, headers = head.partition(b"\r\n")
+    if status_line.split(b" ", 2)[1:2] != [b"200"]:
+        return None
+    if b"transfer-encoding: chunked" in headers.lower():
+        body = _decode_chunked(body)
+    return json.loads(body)
+
+
+async def _probe_vm_port(port: int, process_name: str, timeout: float) -> DTDEntry | None:
+    """Probe a single loopback port for a Dart VM service."""
+    try:
+        data = await asyncio.wait_for(_fetch_vm_info(port), timeout=timeout)
+        if data is None:
+            return None
+        vm_name = data.get("result", {}).get("name", "Dart VM")
+    except Exception:
+        return None
+    return (
+        f"ws://127.0.0.1:{port}/ws",
+        f"http://127.0.0.1:{port}",
+        process_name,
+        f"{vm_name} (auth token may be required)",
+    )
+
+
+async def _probe_vm_ports(
+    candidate_ports: list[tuple[int, str]], seen_ports: set[int], timeout: float
+) -> list[DTDEntry]:
+    """Step 3b: Probe candidate ports for a Dart VM service, all at once."""
+    probes = await asyncio.gather(*(
+        _probe_vm_port(port, process_name, timeout)
+        for port, process_name in candidate_ports
+        if port not in seen_ports
+    ))
+    return [entry for entry in probes if entry is not None]
+
+
+_LOG_SHOW_CMD = (
+    "log", "show",
+    "--predicate",
+    'processImagePath CONTAINS "dart" OR processImagePath CONTAINS "flutter"',
+    "--last", "5m",
+    "--style", "compact",
+)
+
+
+async def _scan_console_logs(stop_at_first: bool = False, timeout: float = 15) -> list[DTDEntry]:
+    """Step 4: Check macOS Console logs."""
+    entries: list[DTDEntry] = []
+
+    def on_line(line: str) -> bool:
+        if "://" in line:
+            for match in _DTD_URI_RE.finditer(line):
+                entries.append(
+                    (*_normalize_dtd_match(match.group()), "flutter (from system logs)", "")
+                )
+        return len(entries) >= MAX_DISCOVERED or (stop_at_first and bool(entries))
+
+    await _stream_command_lines(_LOG_SHOW_CMD, on_line, timeout=timeout)
+    return entries
+
 
 @mcp.tool
 async def discover_dtd_uris(
     timeout: Annotated[float, Field(description="Timeout in seconds for probing each port")] = 2.0,
+    exhaustive: Annotated[
+        bool,
+        Field(
+            description="Always probe ports and scan macOS logs, even if other steps "
+            "already found URIs (also bypasses the short-lived result cache)"
+        ),
+    ] = False,
 ) -> str:
     """Discover running Dart Tooling Daemon (DTD) URIs for Flutter debugging.
 
     These URIs can be used with the Dart MCP server's connect_dart_tooling_daemon tool
     for hot reload, widget inspection, and other Flutter debugging features.
     """
-    import glob as glob_module
-
-    import httpx
+    global _last_discovery
+    if (
+        not exhaustive
+        and _last_discovery is not None
+        and time.monotonic() - _last_discovery[0] < DTD_DISCOVERY_CACHE_TTL
+    ):
+        return _last_discovery[1]
 
     discovered = []
     seen_uris: set[str] = set()
+    seen_ports: set[int] = set()
 
-    def add_uri(dtd_uri: str, http_uri: str = "", process: str = "", vm_name: str = ""):
-        if dtd_uri in seen_uris:
+    def add_uri(dtd_uri: str, http_uri: str, process: str, vm_name: str):
+        if dtd_uri in seen_uris or len(discovered) >= MAX_DISCOVERED:
             return
         seen_uris.add(dtd_uri)
+        port = urlsplit(dtd_uri).port
+        if port is not None:
+            seen_ports.add(port)
         discovered.append({
             "dtd_uri": dtd_uri,
-            "http_uri": http_uri or dtd_uri.replace("ws://", "http://").replace("/ws", "/"),
+            "http_uri": http_uri,
             "process": process,
             "vm_name": vm_name or "Dart VM",
         })
 
-    # Step 1: Look for VM service URIs in process command lines
-    try:
-        result = subprocess.run(["ps", "aux"], capture_output=True, text=True, timeout=10)
-        uri_pattern = re.compile(
-            r'((?:ws|http)s?://(?:127\.0\.0\.1|localhost):\d+/[A-Za-z0-9+/]+=*/?)(?:ws)?'
-        )
-
-        for line in result.stdout.split("\n"):
-            lower_line = line.lower()
-            if "dart" in lower_line or "flutter" in lower_line:
-                matches = uri_pattern.findall(line)
-                for match in matches:
-                    http_uri = match.replace("ws://", "http://").replace("wss://", "https://")
-                    http_uri = http_uri.rstrip("/")
-                    if http_uri.endswith("/ws"):
-                        http_uri = http_uri[:-3]
-                    if not http_uri.endswith("="):
-                        http_uri += "="
-                    http_uri += "/"
-
-                    ws_uri = http_uri.replace("http://", "ws://").replace("https://", "wss://")
-                    ws_uri = ws_uri.rstrip("/") + "/ws"
-
-                    parts = line.split()
-                    process_name = parts[10] if len(parts) > 10 else "dart"
-                    add_uri(ws_uri, http_uri, process_name)
-    except Exception as e:
-        logger.debug(f"Error scanning processes: {e}")
-
-    # Step 2: Check Flutter tool state files
-    try:
-        flutter_state_patterns = [
-            str(Path.home() / ".flutter_tool_state"),
-            "/tmp/flutter_tools.*",
-        ]
-
-        for pattern in flutter_state_patterns:
-            for state_dir in glob_module.glob(pattern):
-                if os.path.isdir(state_dir):
-                    for filename in os.listdir(state_dir):
-                        filepath = os.path.join(state_dir, filename)
-                        if os.path.isfile(filepath):
-                            try:
-                                with open(filepath) as f:
-                                    content = f.read()
-                                    uri_pattern = re.compile(
-                                        r'((?:ws|http)s?://(?:127\.0\.0\.1|localhost):\d+/[A-Za-z0-9+/]+=*/?)(?:ws)?'
-                                    )
-                                    matches = uri_pattern.findall(content)
-                                    for match in matches:
-                                        http_uri = match.replace("ws://", "http://").replace(
-                                            "wss://",
-                                            "https://",
-                                        )
-                                        http_uri = http_uri.rstrip("/")
-                                        if http_uri.endswith("/ws"):
-                                            http_uri = http_uri[:-3]
-                                        if not http_uri.endswith("="):
-                                            http_uri += "="
-                                        http_uri += "/"
-
-                                        ws_uri = http_uri.replace("http://", "ws://").replace(
-                                            "https://",
-                                            "wss://",
-                                        )
-                                        ws_uri = ws_uri.rstrip("/") + "/ws"
-                                        add_uri(ws_uri, http_uri, "flutter (from state file)")
-                            except Exception:
-                                pass
-    except Exception as e:
-        logger.debug(f"Error checking Flutter state files: {e}")
-
-    # Step 3: Find dart processes with listening ports and probe them
-    try:
-        result = subprocess.run(
-            ["lsof", "-iTCP", "-sTCP:LISTEN", "-n", "-P"],
-            capture_output=True, text=True, timeout=10,
-        )
-
-        candidate_ports: list[tuple[int, str]] = []
-
-        for line in result.stdout.split("\n"):
-            lower_line = line.lower()
-            if "dart" in lower_line or "flutter" in lower_line:
-                match = re.search(r":(\d+)\s*$", line)
-                if match:
-                    port = int(match.group(1))
-                    parts = line.split()
-                    process_name = parts[0] if parts else "unknown"
-                    candidate_ports.append((port, process_name))
-
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            for port, process_name in candidate_ports:
-                if any(str(port) in uri for uri in seen_uris):
-                    continue
-
-                try:
-                    base_url = f"http://127.0.0.1:{port}"
-                    response = await client.get(f"{base_url}/getVM", timeout=timeout)
-                    if response.status_code == 200:
-                        data = response.json()
-                        vm_name = data.get("result", {}).get("name", "Dart VM")
-                        ws_uri = f"ws://127.0.0.1:{port}/ws"
-                        add_uri(
-                            ws_uri,
-                            base_url,
-                            process_name,
-                            f"{vm_name} (auth token may be required)",
-                        )
-                except Exception:
-                    pass
-    except Exception as e:
-        logger.debug(f"Error probing ports: {e}")
-
-    # Step 4: Check macOS Console logs
-    try:
-        result = subprocess.run(
-            [
-                "log", "show",
-                "--predicate",
-                'processImagePath CONTAINS "dart" OR processImagePath CONTAINS "flutter"',
-                "--last", "5m",
-                "--style", "compact",
-            ],
-            capture_output=True, text=True, timeout=15,
-        )
+    def add_step(step: str, entries: list[DTDEntry] | BaseException) -> None:
+        if isinstance(entries, BaseException):
+            logger.debug(f"Error {step}: {entries}")
+            return
+        for entry in entries:
+            add_uri(*entry)
+
+    # The discovery steps are independent, so their subprocesses run concurrently.
+    # `log show` is by far the slowest, so unless asked for an exhaustive scan it
+    # only runs as a fallback when the cheaper steps find nothing.
+    steps = [_scan_process_list(), _scan_flutter_state_files(), _list_dart_listening_ports()]
+    if exhaustive:
+        steps.append(_scan_console_logs())
+    ps_entries, state_entries, candidate_ports, *log_results = await asyncio.gather(
+        *steps, return_exceptions=True
+    )
+    add_step("scanning processes", ps_entries)
+    add_step("checking Flutter state files", state_entries)
+
+    # URIs from steps 1-2 carry their auth token, which port probes cannot
+    # recover, so probing is only worth it when nothing was found yet.
+    # It needs the ports found so far to skip ones that are already known.
+    if isinstance(candidate_ports, BaseException):
+        add_step("probing ports", candidate_ports)
+    elif discovered and not exhaustive:
+        logger.debug("Skipping port probes; %d DTD URI(s) already found", len(discovered))
+    else:
+        add_step("probing ports", await _probe_vm_ports(candidate_ports, seen_ports, timeout))
 
-        uri_pattern = re.compile(
-            r'((?:ws|http)s?://(?:127\.0\.0\.1|localhost):\d+/[A-Za-z0-9+/]+=*/?)(?:ws)?'
+    if not log_results and not discovered:
+        log_results = await asyncio.gather(
+            _scan_console_logs(stop_at_first=True), return_exceptions=True
         )
-        matches = uri_pattern.findall(result.stdout)
-        for match in matches:
-            http_uri = match.replace("ws://", "http://").replace("wss://", "https://")
-            http_uri = http_uri.rstrip("/")
-            if http_uri.endswith("/ws"):
-                http_uri = http_uri[:-3]
-            if not http_uri.endswith("="):
-                http_uri += "="
-            http_uri += "/"
-
-            ws_uri = http_uri.replace("http://", "ws://").replace("https://", "wss://")
-            ws_uri = ws_uri.rstrip("/") + "/ws"
-            add_uri(ws_uri, http_uri, "flutter (from system logs)")
-    except Exception as e:
-        logger.debug(f"Error checking system logs: {e}")
+    if log_results:
+        add_step("checking system logs", log_results[0])
+    else:
+        logger.debug("Skipping macOS console scan; %d DTD URI(s) already found", len(discovered))
 
     if not discovered:
         return (
@@ -1127,7 +1613,44 @@ async def discover_dtd_uris(
         "\nUse one of these URIs with the Dart MCP server's "
         "connect_dart_tooling_daemon tool."
     )
-    return "\n".join(result_lines)
+    result = "\n".join(result_lines)
+    _last_discovery = (time.monotonic(), result)
+    return result
+
+
+# === Batching ===
+
+
+@mcp.tool
+async def batch_call(
+    calls: Annotated[
+        list[dict[str, Any]],
+        Field(
+            min_length=1,
+            description="Tool calls to run in order, each {'tool': name, 'args': {...}}",
+        ),
+    ],
+    continue_on_error: Annotated[
+        bool, Field(description="Keep going after a failed call instead of stopping")
+    ] = False,
+) -> dict[str, Any]:
+    """Run several tool calls in order within a single request."""
+    results: list[dict[str, Any]] = []
+    start = time.perf_counter()
+    for call in calls:
+        name = call.get("tool")
+        try:
+            if name == "batch_call":
+                raise ValueError("batch_call cannot be nested")
+            result = await _call_tool_in_process(name, call.get("args") or {})
+        except Exception as e:
+            results.append({"tool": name, "ok": False, "error": str(e)})
+            if not continue_on_error:
+                break
+        else:
+            results.append({"tool": name, "ok": True, "result": result})
+
+    return {"results": results, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
 
 
 # === Resources ===
@@ -1177,6 +1700,8 @@ API_REFERENCE = """# Mobile Pilot MCP API Reference
 | set_clipboard | Set clipboard content |
 | get_window_size | Get screen dimensions |
 | set_status_bar | Override status bar appearance |
+| set_status_bar_batch | Several status bar overrides in one call (preferred) |
+| batch_call | Run a list of {tool, args} calls in order in one request |
 | clear_status_bar | Clear status bar overrides |
 | dismiss_keyboard | Dismiss on-screen keyboard |
 | set_appearance | Set dark/light mode |
@@ -1285,16 +1810,26 @@ tap device_id="..." x=200 y=400
 """
 
 
-@mcp.resource("mobile-pilot://api-reference")
-def get_api_reference() -> str:
-    """Mobile Pilot MCP API Reference - Complete API documentation."""
-    return API_REFERENCE
-
-
-@mcp.resource("mobile-pilot://automation-guide")
-def get_automation_guide() -> str:
-    """Mobile Pilot MCP Automation Guide - Guide for automating mobile simulators."""
-    return AUTOMATION_GUIDE
+# The docs never change, so register them as static text resources that are
+# returned as-is instead of calling a function on every read.
+mcp.add_resource(
+    TextResource(
+        uri="mobile-pilot://api-reference",
+        name="get_api_reference",
+        description="Mobile Pilot MCP API Reference - Complete API documentation.",
+        mime_type="text/markdown",
+        text=API_REFERENCE,
+    )
+)
+mcp.add_resource(
+    TextResource(
+        uri="mobile-pilot://automation-guide",
+        name="get_automation_guide",
+        description="Mobile Pilot MCP Automation Guide - Guide for automating mobile simulators.",
+        mime_type="text/markdown",
+        text=AUTOMATION_GUIDE,
+    )
+)
 
 
 # Backward-compatible export for existing imports:
@@ -1306,7 +1841,17 @@ server = mcp
 
 
 def main():
-    """Run the MCP server."""
+    """Run the MCP server (on uvloop when it is installed)."""
+    if sys.platform != "win32":
+        try:
+            import uvloop  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            import anyio
+
+            anyio.run(mcp.run_async, backend_options={"use_uvloop": True})
+            return
     mcp.run()
 
 
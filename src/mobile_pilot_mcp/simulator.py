@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import heapq
 import json
 import logging
+import os
+import plistlib
 import re
+import signal
 import subprocess
+import time
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
@@ -14,6 +20,9 @@ from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Runtime identifiers look like "com.apple.CoreSimulator.SimRuntime.iOS-17-4"
+_IOS_VERSION_RE = re.compile(r"iOS[.-](\d+)[.-](\d+)")
+
 
 class SimulatorState(str, Enum):
     """Simulator runtime state."""
@@ -24,6 +33,10 @@ class SimulatorState(str, Enum):
     SHUTTING_DOWN = "Shutting Down"
 
 
+# simctl state strings to enum members, avoiding a raising Enum() lookup per device
+_STATES_BY_VALUE = {state.value: state for state in SimulatorState}
+
+
 @dataclass
 class SimulatorDevice:
     """Represents an iOS Simulator device."""
@@ -37,11 +50,10 @@ class SimulatorDevice:
     data_path: str | None = None
     log_path: str | None = None
 
-    @property
+    @functools.cached_property
     def ios_version(self) -> str:
-        """Extract iOS version from runtime string."""
-        # Runtime looks like "com.apple.CoreSimulator.SimRuntime.iOS-17-4"
-        match = re.search(r"iOS[.-](\d+)[.-](\d+)", self.runtime)
+        """Extract iOS version from runtime string (computed once per device)."""
+        match = _IOS_VERSION_RE.search(self.runtime)
         if match:
             return f"{match.group(1)}.{match.group(2)}"
         return "Unknown"
@@ -73,6 +85,123 @@ class InstalledApp:
     version: str | None = None
 
 
+# Common built-in apps, listed alongside installed ones (they live outside the
+# simulator's data directory)
+_SYSTEM_APPS: tuple[InstalledApp, ...] = (
+    InstalledApp(bundle_id="com.apple.Preferences", name="Settings"),
+    InstalledApp(bundle_id="com.apple.mobilesafari", name="Safari"),
+    InstalledApp(bundle_id="com.apple.mobilecal", name="Calendar"),
+    InstalledApp(bundle_id="com.apple.mobilemail", name="Mail"),
+    InstalledApp(bundle_id="com.apple.mobilenotes", name="Notes"),
+    InstalledApp(bundle_id="com.apple.reminders", name="Reminders"),
+    InstalledApp(bundle_id="com.apple.Maps", name="Maps"),
+    InstalledApp(bundle_id="com.apple.Photos", name="Photos"),
+    InstalledApp(bundle_id="com.apple.camera", name="Camera"),
+    InstalledApp(bundle_id="com.apple.AppStore", name="App Store"),
+    InstalledApp(bundle_id="com.apple.weather", name="Weather"),
+    InstalledApp(bundle_id="com.apple.calculator", name="Calculator"),
+    InstalledApp(bundle_id="com.apple.compass", name="Compass"),
+    InstalledApp(bundle_id="com.apple.clock", name="Clock"),
+    InstalledApp(bundle_id="com.apple.Health", name="Health"),
+    InstalledApp(bundle_id="com.apple.Fitness", name="Fitness"),
+    InstalledApp(bundle_id="com.apple.Passbook", name="Wallet"),
+    InstalledApp(bundle_id="com.apple.tips", name="Tips"),
+    InstalledApp(bundle_id="com.apple.podcasts", name="Podcasts"),
+    InstalledApp(bundle_id="com.apple.tv", name="TV"),
+    InstalledApp(bundle_id="com.apple.facetime", name="FaceTime"),
+    InstalledApp(bundle_id="com.apple.MobileStore", name="iTunes Store"),
+)
+
+
+def _app_sort_key(app: InstalledApp) -> str:
+    return app.name.lower()
+
+
+# Sorted once, so list_apps only has to sort the apps found on disk
+_SYSTEM_APPS_SORTED = tuple(sorted(_SYSTEM_APPS, key=_app_sort_key))
+
+
+def _apps_dir_signature(apps_dir: Path) -> tuple[int, tuple[tuple[str, int], ...]] | None:
+    """Cheap change detector for an apps directory.
+
+    Installing, updating or removing an app adds, replaces or removes entries
+    in a container, which bumps the directory or container mtimes.
+    """
+    try:
+        with os.scandir(apps_dir) as it:
+            containers = tuple(sorted((entry.name, entry.stat().st_mtime_ns) for entry in it))
+        return apps_dir.stat().st_mtime_ns, containers
+    except FileNotFoundError:
+        return None
+
+
+def _read_plist(path: Path) -> dict[str, Any]:
+    """Read a binary or XML plist in-process."""
+    with open(path, "rb") as f:
+        return plistlib.load(f)
+
+
+def _read_installed_apps(apps_dir: Path) -> list[InstalledApp]:
+    """Read every app bundle's Info.plist under a simulator apps directory.
+
+    Blocking filesystem work; callers run it in a worker thread.
+    """
+    apps: list[InstalledApp] = []
+    # scandir's d_type answers is_dir() without a stat per entry
+    with os.scandir(apps_dir) as containers:
+        container_paths = [c.path for c in containers if c.is_dir(follow_symlinks=False)]
+    for container_path in container_paths:
+        with os.scandir(container_path) as entries:
+            bundles = [(e.path, e.name) for e in entries if e.name.endswith(".app")]
+        for bundle_path, bundle_name in bundles:
+            try:
+                info = _read_plist(Path(bundle_path, "Info.plist"))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.debug(f"Failed to read app info: {e}")
+                continue
+            apps.append(
+                InstalledApp(
+                    bundle_id=info.get("CFBundleIdentifier", "unknown"),
+                    name=info.get(
+                        "CFBundleDisplayName", info.get("CFBundleName", bundle_name[:-4])
+                    ),
+                    path=bundle_path,
+                    version=info.get("CFBundleShortVersionString"),
+                )
+            )
+    return apps
+
+
+# Grace periods when stopping a recording: SIGINT lets simctl finalize the
+# movie (normally well under two seconds), SIGTERM is the last polite ask
+RECORDING_SIGINT_TIMEOUT = 10.0
+RECORDING_SIGTERM_TIMEOUT = 5.0
+
+# Fallback command prefix when simctl's absolute path cannot be resolved
+_XCRUN_SIMCTL = ("xcrun", "simctl")
+
+
+async def _resolve_simctl() -> tuple[str, ...]:
+    """Locate the simctl binary so commands can skip the xcrun dispatcher."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "xcrun",
+            "-f",
+            "simctl",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await proc.communicate()
+    except FileNotFoundError:
+        return _XCRUN_SIMCTL
+    path = stdout.decode("utf-8", "replace").strip()
+    if proc.returncode == 0 and path and os.path.isfile(path):
+        return (path,)
+    return _XCRUN_SIMCTL
+
+
 class SimulatorError(Exception):
     """Simulator operation error."""
 
@@ -86,44 +215,82 @@ class SimulatorManager:
         self._devices_cache: dict[str, SimulatorDevice] = {}
         self._cache_timestamp: float = 0
         self._cache_ttl: float = 5.0  # Cache devices for 5 seconds
-
-    async def _run_simctl(
+        # simctl command prefix, resolved on first use
+        self._simctl_prefix: tuple[str, ...] | None = None
+        # In-flight `simctl list` shared by concurrent list_devices callers
+        self._list_devices_task: asyncio.Task[list[SimulatorDevice]] | None = None
+        # The shared fetch once it has started running simctl
+        self._list_devices_started: asyncio.Task[Any] | None = None
+        # Per-UDID (apps dir signature, installed apps) from the last list_apps
+        self._apps_cache: dict[str, tuple[Any, list[InstalledApp]]] = {}
+
+    async def _run_simctl_raw(
         self,
         *args: str,
         timeout: float = 30.0,
         check: bool = True,
-    ) -> subprocess.CompletedProcess[str]:
-        """Run xcrun simctl command."""
-        cmd = ["xcrun", "simctl", *args]
+        input: bytes | None = None,
+    ) -> subprocess.CompletedProcess[bytes]:
+        """Run xcrun simctl command and return undecoded output.
+
+        ``input`` is written to the command's stdin (for ``-`` file arguments).
+        """
+        prefix = await self._simctl_command()
+        cmd = [*prefix, *args]
         logger.debug(f"Running: {' '.join(cmd)}")
 
         try:
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
+                stdin=asyncio.subprocess.PIPE if input is not None else None,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
-            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            stdout, stderr = await asyncio.wait_for(proc.communicate(input), timeout=timeout)
         except asyncio.TimeoutError as e:
             raise SimulatorError(f"Command timed out: {' '.join(cmd)}") from e
         except FileNotFoundError as e:
+            if prefix != _XCRUN_SIMCTL:
+                # The developer dir moved (e.g. xcode-select): resolve again
+                self._simctl_prefix = None
+                return await self._run_simctl_raw(*args, timeout=timeout, check=check, input=input)
             raise SimulatorError(
                 "xcrun not found. Make sure Xcode Command Line Tools are installed."
             ) from e
 
-        result = subprocess.CompletedProcess(
-            cmd,
-            proc.returncode or 0,
-            stdout.decode("utf-8"),
-            stderr.decode("utf-8"),
-        )
+        result = subprocess.CompletedProcess(cmd, proc.returncode or 0, stdout, stderr)
 
         if check and result.returncode != 0:
-            error_msg = result.stderr.strip() or result.stdout.strip() or "Unknown error"
+            error_msg = (
+                result.stderr.decode("utf-8", "replace").strip()
+                or result.stdout.decode("utf-8", "replace").strip()
+                or "Unknown error"
+            )
             raise SimulatorError(f"simctl command failed: {error_msg}")
 
         return result
 
+    async def _simctl_command(self) -> tuple[str, ...]:
+        """Command prefix for simctl; resolved once since xcrun costs a process hop."""
+        if self._simctl_prefix is None:
+            self._simctl_prefix = await _resolve_simctl()
+        return self._simctl_prefix
+
+    async def _run_simctl(
+        self,
+        *args: str,
+        timeout: float = 30.0,
+        check: bool = True,
+    ) -> subprocess.CompletedProcess[str]:
+        """Run xcrun simctl command."""
+        result = await self._run_simctl_raw(*args, timeout=timeout, check=check)
+        return subprocess.CompletedProcess(
+            result.args,
+            result.returncode,
+            result.stdout.decode("utf-8"),
+            result.stderr.decode("utf-8"),
+        )
+
     async def list_devices(self, refresh: bool = False) -> list[SimulatorDevice]:
         """List all available simulators.
 
@@ -133,13 +300,32 @@ class SimulatorManager:
         Returns:
             List of SimulatorDevice objects
         """
-        import time
-
         now = time.time()
         if not refresh and self._devices_cache and (now - self._cache_timestamp) < self._cache_ttl:
             return list(self._devices_cache.values())
 
-        result = await self._run_simctl("list", "devices", "-j")
+        # Concurrent callers share one simctl run instead of each spawning their own.
+        # A refresh only joins a run that has not started yet, so it never gets
+        # a listing taken before it was asked for.
+        task = self._list_devices_task
+        if task is None or (refresh and task is self._list_devices_started):
+            task = asyncio.create_task(self._fetch_devices(now))
+            self._list_devices_task = task
+            task.add_done_callback(self._clear_list_devices_task)
+        # Shielded so one cancelled caller does not cancel the fetch for the rest
+        return list(await asyncio.shield(task))
+
+    def _clear_list_devices_task(self, task: asyncio.Task[list[SimulatorDevice]]) -> None:
+        if self._list_devices_task is task:
+            self._list_devices_task = None
+        if self._list_devices_started is task:
+            self._list_devices_started = None
+
+    async def _fetch_devices(self, now: float) -> list[SimulatorDevice]:
+        """Run `simctl list devices` and rebuild the device cache."""
+        self._list_devices_started = asyncio.current_task()
+        # json.loads takes the raw bytes, so skip decoding the (large) listing
+        result = await self._run_simctl_raw("list", "devices", "-j")
 
         try:
             data = json.loads(result.stdout)
@@ -147,14 +333,12 @@ class SimulatorManager:
             raise SimulatorError(f"Failed to parse simctl output: {e}") from e
 
         devices: list[SimulatorDevice] = []
+        devices_by_udid: dict[str, SimulatorDevice] = {}
         for runtime, device_list in data.get("devices", {}).items():
             for device_data in device_list:
-                state_str = device_data.get("state", "Shutdown")
-                try:
-                    state = SimulatorState(state_str)
-                except ValueError:
-                    state = SimulatorState.SHUTDOWN
-
+                state = _STATES_BY_VALUE.get(
+                    device_data.get("state", "Shutdown"), SimulatorState.SHUTDOWN
+                )
                 device = SimulatorDevice(
                     udid=device_data["udid"],
                     name=device_data["name"],
@@ -166,52 +350,90 @@ class SimulatorManager:
                     log_path=device_data.get("logPath"),
                 )
                 devices.append(device)
-                self._devices_cache[device.udid] = device
+                devices_by_udid[device.udid] = device
 
-        self._cache_timestamp = now
+        # Rebuilt wholesale so deleted simulators drop out of get_device lookups.
+        # A slower, older run must not overwrite a newer listing.
+        if now >= self._cache_timestamp:
+            self._devices_cache = devices_by_udid
+            self._cache_timestamp = now
         return devices
 
     async def get_device(self, udid: str) -> SimulatorDevice | None:
         """Get a specific device by UDID."""
-        devices = await self.list_devices()
-        for device in devices:
-            if device.udid == udid:
-                return device
-        return None
+        await self.list_devices()
+        return self._devices_cache.get(udid)
+
+    def _fresh_cached_device(self, udid: str) -> SimulatorDevice | None:
+        """Return a device from the cache if the cache is still fresh, without refreshing."""
+        if time.time() - self._cache_timestamp >= self._cache_ttl:
+            return None
+        return self._devices_cache.get(udid)
 
     async def get_booted_devices(self) -> list[SimulatorDevice]:
         """Get all booted simulators."""
         devices = await self.list_devices(refresh=True)
         return [d for d in devices if d.is_booted]
 
-    async def boot(self, udid: str) -> None:
-        """Boot a simulator."""
-        device = await self.get_device(udid)
-        if not device:
-            raise SimulatorError(f"Device not found: {udid}")
+    async def boot(self, udid: str, check_exists: bool = False) -> None:
+        """Boot a simulator.
+
+        Only a fresh cache entry is consulted up front; otherwise simctl itself
+        reports unknown UDIDs, which avoids a `simctl list` before every boot.
 
-        if device.is_booted:
+        Args:
+            udid: Simulator UDID
+            check_exists: Refresh the device list first and raise if the UDID is unknown
+        """
+        if check_exists:
+            device = await self.get_device(udid)
+            if not device:
+                raise SimulatorError(f"Device not found: {udid}")
+        else:
+            device = self._fresh_cached_device(udid)
+
+        if device and device.is_booted:
             logger.info(f"Simulator {udid} is already booted")
             return
 
-        await self._run_simctl("boot", udid, timeout=60.0)
-        logger.info(f"Booted simulator: {udid}")
+        try:
+            await self._run_simctl("boot", udid, timeout=60.0)
+        except SimulatorError as e:
+            if "current state: Booted" not in str(e):
+                raise
+            logger.info(f"Simulator {udid} is already booted")
+        else:
+            logger.info(f"Booted simulator: {udid}")
 
         # Clear cache to reflect new state
         self._devices_cache.clear()
 
-    async def shutdown(self, udid: str) -> None:
-        """Shutdown a simulator."""
-        device = await self.get_device(udid)
-        if not device:
-            raise SimulatorError(f"Device not found: {udid}")
+    async def shutdown(self, udid: str, check_exists: bool = False) -> None:
+        """Shutdown a simulator.
 
-        if not device.is_booted:
+        Args:
+            udid: Simulator UDID
+            check_exists: Refresh the device list first and raise if the UDID is unknown
+        """
+        if check_exists:
+            device = await self.get_device(udid)
+            if not device:
+                raise SimulatorError(f"Device not found: {udid}")
+        else:
+            device = self._fresh_cached_device(udid)
+
+        if device and not device.is_booted:
             logger.info(f"Simulator {udid} is already shut down")
             return
 
-        await self._run_simctl("shutdown", udid, timeout=30.0)
-        logger.info(f"Shut down simulator: {udid}")
+        try:
+            await self._run_simctl("shutdown", udid, timeout=30.0)
+        except SimulatorError as e:
+            if "current state: Shutdown" not in str(e):
+                raise
+            logger.info(f"Simulator {udid} is already shut down")
+        else:
+            logger.info(f"Shut down simulator: {udid}")
 
         # Clear cache
         self._devices_cache.clear()
@@ -241,13 +463,31 @@ class SimulatorManager:
         await self._run_simctl("io", udid, "screenshot", str(output_path), timeout=30.0)
         return output_path
 
+    async def screenshot_bytes(self, udid: str) -> bytes:
+        """Take a PNG screenshot using simctl, streamed over stdout.
+
+        Avoids writing and re-reading a temporary file on disk.
+
+        Args:
+            udid: Simulator UDID
+
+        Returns:
+            Encoded PNG bytes
+        """
+        result = await self._run_simctl_raw(
+            "io", udid, "screenshot", "--type=png", "-", timeout=30.0
+        )
+        return result.stdout
+
     async def install_app(self, udid: str, app_path: str | Path) -> None:
         """Install an app on the simulator."""
         await self._run_simctl("install", udid, str(app_path), timeout=120.0)
+        self._apps_cache.pop(udid, None)
 
     async def uninstall_app(self, udid: str, bundle_id: str) -> None:
         """Uninstall an app from the simulator."""
         await self._run_simctl("uninstall", udid, bundle_id, timeout=30.0)
+        self._apps_cache.pop(udid, None)
 
     async def launch_app(self, udid: str, bundle_id: str) -> None:
         """Launch an app on the simulator."""
@@ -261,87 +501,35 @@ class SimulatorManager:
         """List installed apps on the simulator.
 
         Note: This uses a workaround since simctl doesn't have a direct command.
+        Results are reused until the apps directory changes on disk.
         """
         device = await self.get_device(udid)
         if not device or not device.data_path:
             return []
 
-        apps: list[InstalledApp] = []
+        apps_dir = Path(device.data_path) / "Containers" / "Bundle" / "Application"
+        signature = _apps_dir_signature(apps_dir)
+        cached = self._apps_cache.get(udid)
+        if cached is not None and cached[0] == signature:
+            return list(cached[1])
 
         # Check installed apps in the simulator's data directory
-        apps_dir = Path(device.data_path) / "Containers" / "Bundle" / "Application"
-        if apps_dir.exists():
-            for app_container in apps_dir.iterdir():
-                if app_container.is_dir():
-                    for item in app_container.iterdir():
-                        if item.suffix == ".app":
-                            # Try to read Info.plist
-                            info_plist = item / "Info.plist"
-                            if info_plist.exists():
-                                try:
-                                    # Use plutil to read plist
-                                    proc = await asyncio.create_subprocess_exec(
-                                        "plutil",
-                                        "-convert",
-                                        "json",
-                                        "-o",
-                                        "-",
-                                        str(info_plist),
-                                        stdout=asyncio.subprocess.PIPE,
-                                        stderr=asyncio.subprocess.PIPE,
-                                    )
-                                    stdout, _ = await proc.communicate()
-                                    if proc.returncode == 0:
-                                        info = json.loads(stdout.decode())
-                                        apps.append(
-                                            InstalledApp(
-                                                bundle_id=info.get(
-                                                    "CFBundleIdentifier", "unknown"
-                                                ),
-                                                name=info.get(
-                                                    "CFBundleDisplayName",
-                                                    info.get("CFBundleName", item.stem),
-                                                ),
-                                                path=str(item),
-                                                version=info.get("CFBundleShortVersionString"),
-                                            )
-                                        )
-                                except Exception as e:
-                                    logger.debug(f"Failed to read app info: {e}")
-
-        # Also list some common system apps
-        system_apps = [
-            InstalledApp(bundle_id="com.apple.Preferences", name="Settings"),
-            InstalledApp(bundle_id="com.apple.mobilesafari", name="Safari"),
-            InstalledApp(bundle_id="com.apple.mobilecal", name="Calendar"),
-            InstalledApp(bundle_id="com.apple.mobilemail", name="Mail"),
-            InstalledApp(bundle_id="com.apple.mobilenotes", name="Notes"),
-            InstalledApp(bundle_id="com.apple.reminders", name="Reminders"),
-            InstalledApp(bundle_id="com.apple.Maps", name="Maps"),
-            InstalledApp(bundle_id="com.apple.Photos", name="Photos"),
-            InstalledApp(bundle_id="com.apple.camera", name="Camera"),
-            InstalledApp(bundle_id="com.apple.AppStore", name="App Store"),
-            InstalledApp(bundle_id="com.apple.weather", name="Weather"),
-            InstalledApp(bundle_id="com.apple.calculator", name="Calculator"),
-            InstalledApp(bundle_id="com.apple.compass", name="Compass"),
-            InstalledApp(bundle_id="com.apple.clock", name="Clock"),
-            InstalledApp(bundle_id="com.apple.Health", name="Health"),
-            InstalledApp(bundle_id="com.apple.Fitness", name="Fitness"),
-            InstalledApp(bundle_id="com.apple.Passbook", name="Wallet"),
-            InstalledApp(bundle_id="com.apple.tips", name="Tips"),
-            InstalledApp(bundle_id="com.apple.podcasts", name="Podcasts"),
-            InstalledApp(bundle_id="com.apple.tv", name="TV"),
-            InstalledApp(bundle_id="com.apple.facetime", name="FaceTime"),
-            InstalledApp(bundle_id="com.apple.MobileStore", name="iTunes Store"),
-        ]
+        apps: list[InstalledApp] = []
+        if signature is not None:
+            apps = await asyncio.to_thread(_read_installed_apps, apps_dir)
 
-        # Add system apps if not already in the list
+        # Merge in common system apps not already found on disk
         existing_bundle_ids = {app.bundle_id for app in apps}
-        for sys_app in system_apps:
-            if sys_app.bundle_id not in existing_bundle_ids:
-                apps.append(sys_app)
-
-        return sorted(apps, key=lambda a: a.name.lower())
+        apps.sort(key=_app_sort_key)
+        apps = list(
+            heapq.merge(
+                apps,
+                (app for app in _SYSTEM_APPS_SORTED if app.bundle_id not in existing_bundle_ids),
+                key=_app_sort_key,
+            )
+        )
+        self._apps_cache[udid] = (signature, apps)
+        return list(apps)
 
     async def open_url(self, udid: str, url: str) -> None:
         """Open a URL in the simulator."""
@@ -396,16 +584,10 @@ class SimulatorManager:
             bundle_id: App bundle ID
             payload: Notification payload dict
         """
-        import tempfile
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(payload, f)
-            payload_path = f.name
-
-        try:
-            await self._run_simctl("push", udid, bundle_id, payload_path, timeout=10.0)
-        finally:
-            Path(payload_path).unlink(missing_ok=True)
+        # "-" makes simctl read the payload from stdin, so no temp file is needed
+        await self._run_simctl_raw(
+            "push", udid, bundle_id, "-", timeout=10.0, input=json.dumps(payload).encode()
+        )
 
     async def clear_keychain(self, udid: str) -> None:
         """Clear the simulator's keychain."""
@@ -488,13 +670,22 @@ class SimulatorManager:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        cmd = ["xcrun", "simctl", "io", udid, "recordVideo", f"--codec={codec}", str(output_path)]
+        cmd = [
+            *await self._simctl_command(),
+            "io",
+            udid,
+            "recordVideo",
+            f"--codec={codec}",
+            str(output_path),
+        ]
         logger.debug(f"Starting recording: {' '.join(cmd)}")
 
+        # Output is never read, so don't pipe it: a full pipe buffer would block
+        # simctl mid-recording and turn the stop into a SIGKILL
         proc = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
         )
         self._recording_processes[udid] = proc
         logger.info(f"Recording started for {udid}: {output_path}")
@@ -512,16 +703,25 @@ class SimulatorManager:
         if not proc:
             return False
 
-        # Send SIGINT to gracefully stop recording
-        proc.send_signal(2)  # SIGINT
-
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=30.0)
-        except asyncio.TimeoutError:
-            proc.kill()
-            await proc.wait()
-
-        logger.info(f"Recording stopped for {udid}")
+        # Escalate only if simctl does not finalize the file in time
+        stages = (
+            (signal.SIGINT, RECORDING_SIGINT_TIMEOUT),
+            (signal.SIGTERM, RECORDING_SIGTERM_TIMEOUT),
+        )
+        for sig, timeout in stages:
+            try:
+                proc.send_signal(sig)
+                await asyncio.wait_for(proc.wait(), timeout=timeout)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
+                continue
+            logger.info(f"Recording stopped for {udid} ({sig.name})")
+            return True
+
+        proc.kill()
+        await proc.wait()
+        logger.warning(f"Recording for {udid} killed; the video may be truncated")
         return True
 
     def is_recording(self, udid: str) -> bool:
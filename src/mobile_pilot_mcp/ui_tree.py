@@ -2,11 +2,70 @@
 
 from __future__ import annotations
 
+import io
+import sys
+import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
-from typing import Any
-
-
-@dataclass
+from typing import Any, Callable
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    lxml_etree = None
+
+if lxml_etree is not None:
+    # huge_tree raises libxml2's default 256-level nesting limit, which deep
+    # iOS hierarchies can exceed; entities are never expanded. Documents past
+    # libxml2's hard 2048-level cap are re-parsed with the stdlib parser.
+    _LXML_ITERPARSE_OPTIONS: dict[str, Any] = {
+        "huge_tree": True,
+        "resolve_entities": False,
+        "remove_comments": True,
+        "remove_pis": True,
+    }
+    _XML_PARSE_ERRORS: tuple[type[Exception], ...] = (ET.ParseError, lxml_etree.XMLSyntaxError)
+else:
+    _XML_PARSE_ERRORS = (ET.ParseError,)
+
+# Shared stand-in for nodes that carry no "rect"; never mutated
+_EMPTY_RECT: dict[str, Any] = {}
+
+# Container types skipped by only_interactable unless they carry a label or name
+_NON_INTERACTIVE: frozenset[str] = frozenset({"Other", "StaticText", "Group", "Cell"})
+
+# Element type -> interned lowercase form. Element types come from a small
+# fixed vocabulary; the cap only guards against arbitrary query strings.
+MAX_TYPE_KEYS = 512
+_type_keys: dict[str, str] = {}
+
+
+def _type_key(elem_type: str) -> str:
+    """Return the lowercased element type used for case-insensitive matching."""
+    key = _type_keys.get(elem_type)
+    if key is None:
+        key = sys.intern(elem_type.lower())
+        if len(_type_keys) < MAX_TYPE_KEYS:
+            _type_keys[elem_type] = key
+    return key
+
+
+# Indentation strings for format_tree, shared instead of rebuilt per node
+_INDENTS = tuple("  " * depth for depth in range(64))
+
+# Bounds hints assume a roughly 390x844 point screen (iPhone 14 Pro).
+# This is a simplification - a real implementation would get the screen size.
+_MID_X = 195
+_MID_Y = 422
+_BOUNDS_HINTS: dict[str, Callable[[int, int], bool]] = {
+    "top_half": lambda cx, cy: cy <= _MID_Y,
+    "bottom_half": lambda cx, cy: cy > _MID_Y,
+    "left_half": lambda cx, cy: cx <= _MID_X,
+    "right_half": lambda cx, cy: cx > _MID_X,
+    "center": lambda cx, cy: 150 < cx < 240 and 300 < cy < 544,
+}
+
+
+@dataclass(slots=True)
 class UIElement:
     """Represents a UI element in the accessibility tree."""
 
@@ -24,30 +83,39 @@ class UIElement:
     width: int = 0
     height: int = 0
     children: list["UIElement"] = field(default_factory=list)
-
-    @property
-    def center_x(self) -> int:
-        return self.x + self.width // 2
-
-    @property
-    def center_y(self) -> int:
-        return self.y + self.height // 2
-
-    @property
-    def display_text(self) -> str:
-        """Get the best text representation for this element."""
-        if self.label:
-            return self.label
-        if self.name:
-            return self.name
-        if self.value:
-            return str(self.value)
-        if self.identifier:
-            return self.identifier
-        return ""
+    # Derived once at construction; bounds never change after parsing
+    center_x: int = field(init=False, repr=False, compare=False)
+    center_y: int = field(init=False, repr=False, compare=False)
+    # Best text representation
+    display_text: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.center_x = self.x + self.width // 2
+        self.center_y = self.y + self.height // 2
+        self.display_text = (
+            self.label
+            or self.name
+            or (str(self.value) if self.value else "")
+            or self.identifier
+            or ""
+        )
 
     def to_dict(self, include_children: bool = True) -> dict[str, Any]:
-        result = {
+        result = self._fields_dict()
+        if include_children and self.children:
+            # Iterative walk: each child dict is linked into its parent's list
+            # as soon as it is created, so no recursion is needed
+            stack = [(self, result)]
+            while stack:
+                elem, elem_dict = stack.pop()
+                if elem.children:
+                    child_dicts = [c._fields_dict() for c in elem.children]
+                    elem_dict["children"] = child_dicts
+                    stack.extend(zip(elem.children, child_dicts))
+        return result
+
+    def _fields_dict(self) -> dict[str, Any]:
+        return {
             "index": self.index,
             "type": self.element_type,
             "label": self.label,
@@ -64,9 +132,6 @@ class UIElement:
             },
             "center": {"x": self.center_x, "y": self.center_y},
         }
-        if include_children and self.children:
-            result["children"] = [c.to_dict(include_children=True) for c in self.children]
-        return result
 
 
 class UITreeParser:
@@ -80,6 +145,8 @@ class UITreeParser:
         source: dict[str, Any] | str,
         only_visible: bool = True,
         only_interactable: bool = False,
+        build_tree: bool = True,
+        build_flat: bool = True,
     ) -> tuple[UIElement | None, list[UIElement]]:
         """Parse WDA source into UIElement tree.
 
@@ -87,6 +154,9 @@ class UITreeParser:
             source: WDA source (JSON dict or XML string)
             only_visible: Only include visible elements
             only_interactable: Only include elements that can be interacted with
+            build_tree: Link children into their parents; when False every
+                element, including the root, is returned without children
+            build_flat: Collect the flat list; when False it is returned empty
 
         Returns:
             Tuple of (root element, flat list of elements with indices)
@@ -95,80 +165,100 @@ class UITreeParser:
 
         if isinstance(source, str):
             # XML format - parse it
-            return self._parse_xml(source, only_visible, only_interactable)
+            return self._parse_xml(
+                source, only_visible, only_interactable, build_tree, build_flat
+            )
         else:
             # JSON format from WDA
-            return self._parse_json(source, only_visible, only_interactable)
+            return self._parse_json(
+                source, only_visible, only_interactable, build_tree, build_flat
+            )
 
     def _parse_json(
         self,
         data: dict[str, Any],
         only_visible: bool,
         only_interactable: bool,
+        build_tree: bool,
+        build_flat: bool,
     ) -> tuple[UIElement | None, list[UIElement]]:
         """Parse JSON hierarchy from WDA."""
         flat_list: list[UIElement] = []
-
-        def parse_element(elem_data: dict[str, Any]) -> UIElement | None:
-            # Extract element properties
-            elem_type = elem_data.get("type", "Unknown")
-            label = elem_data.get("label")
-            name = elem_data.get("name")
-            value = elem_data.get("value")
-            identifier = elem_data.get("identifier")
-            enabled = elem_data.get("isEnabled", elem_data.get("enabled", True))
-            visible = elem_data.get("isVisible", elem_data.get("visible", True))
-            accessible = elem_data.get("isAccessible", elem_data.get("accessible", True))
-
-            # Get bounds
-            rect = elem_data.get("rect", {})
-            x = int(rect.get("x", 0))
-            y = int(rect.get("y", 0))
-            width = int(rect.get("width", 0))
-            height = int(rect.get("height", 0))
-
-            # Filter based on visibility
+        root: UIElement | None = None
+        # Explicit stack instead of recursion: deep hierarchies cost no Python
+        # frames and cannot hit the recursion limit. Children are pushed in
+        # reverse so nodes are still visited (and indexed) in document order.
+        stack: list[tuple[UIElement | None, dict[str, Any]]] = [(None, data)]
+
+        while stack:
+            parent, elem_data = stack.pop()
+
+            # Filter first, reading only the keys the filters need
+            get = elem_data.get
+            # Legacy key names are only looked up when the WDA one is absent
+            visible = get("isVisible")
+            if visible is None:
+                visible = get("visible", True)
             if only_visible and not visible:
-                return None
+                continue
+
+            enabled = get("isEnabled")
+            if enabled is None:
+                enabled = get("enabled", True)
+            accessible = get("isAccessible")
+            if accessible is None:
+                accessible = get("accessible", True)
+            elem_type = sys.intern(get("type", "Unknown"))
+            label = get("label")
+            name = get("name")
 
             # Filter based on interactability
             if only_interactable:
                 if not enabled or not accessible:
-                    return None
+                    continue
                 # Skip non-interactive types
-                non_interactive = {"Other", "StaticText", "Group", "Cell"}
-                if elem_type in non_interactive and not label and not name:
-                    return None
+                if elem_type in _NON_INTERACTIVE and not label and not name:
+                    continue
 
-            # Create element
+            # Remaining properties, only for nodes that are kept
+            value = get("value")
+            identifier = get("identifier")
+            rect = get("rect") or _EMPTY_RECT
+            rect_get = rect.get
+            x = int(rect_get("x", 0))
+            y = int(rect_get("y", 0))
+            width = int(rect_get("width", 0))
+            height = int(rect_get("height", 0))
+
+            # Create element (positional: skips keyword matching per node)
             element = UIElement(
-                index=self._index_counter,
-                element_type=elem_type,
-                label=label,
-                name=name,
-                value=value,
-                identifier=identifier,
-                enabled=enabled,
-                visible=visible,
-                accessible=accessible,
-                x=x,
-                y=y,
-                width=width,
-                height=height,
+                self._index_counter,
+                elem_type,
+                label,
+                name,
+                value,
+                identifier,
+                enabled,
+                visible,
+                accessible,
+                x,
+                y,
+                width,
+                height,
             )
             self._index_counter += 1
-            flat_list.append(element)
-
-            # Parse children
-            children_data = elem_data.get("children", [])
-            for child_data in children_data:
-                child = parse_element(child_data)
-                if child:
-                    element.children.append(child)
+            if build_flat:
+                flat_list.append(element)
+            if parent is None:
+                root = element
+            elif build_tree:
+                parent.children.append(element)
+
+            # Queue children
+            children_data = get("children")
+            if children_data:
+                stack.extend((element, child) for child in reversed(children_data))
 
-            return element
-
-        root = parse_element(data)
         return root, flat_list
 
     def _parse_xml(
@@ -176,22 +266,84 @@ class UITreeParser:
         xml_string: str,
         only_visible: bool,
         only_interactable: bool,
+        build_tree: bool,
+        build_flat: bool,
     ) -> tuple[UIElement | None, list[UIElement]]:
-        """Parse XML hierarchy from WDA."""
-        import xml.etree.ElementTree as ET
+        """Parse XML hierarchy from WDA.
+
+        Streams the document with iterparse: each UIElement is built from its
+        node's start event and the node is cleared on its end event, so the
+        full ElementTree is never held alongside the UIElement tree.
+        """
+        options = (only_visible, only_interactable, build_tree, build_flat)
+        start_index = self._index_counter
+        try:
+            if lxml_etree is not None:
+                events = lxml_etree.iterparse(
+                    io.BytesIO(xml_string.encode()),
+                    events=("start", "end"),
+                    **_LXML_ITERPARSE_OPTIONS,
+                )
+                try:
+                    return self._parse_xml_events(events, *options)
+                except lxml_etree.XMLSyntaxError as e:
+                    # libxml2 refuses nesting past 2048 levels even with
+                    # huge_tree; the stdlib parser has no such limit
+                    if "depth" not in str(e).lower():
+                        raise
+                    self._index_counter = start_index
+            events = ET.iterparse(io.BytesIO(xml_string.encode()), events=("start", "end"))
+            return self._parse_xml_events(events, *options)
+        except _XML_PARSE_ERRORS as e:
+            raise ValueError(f"Failed to parse XML: {e}") from e
 
+    def _parse_xml_events(
+        self,
+        events: Any,
+        only_visible: bool,
+        only_interactable: bool,
+        build_tree: bool,
+        build_flat: bool,
+    ) -> tuple[UIElement | None, list[UIElement]]:
+        """Build UIElements from iterparse start/end events."""
         flat_list: list[UIElement] = []
+        root: UIElement | None = None
+        # Open ancestors of the current node, and how deep we are inside a
+        # filtered-out subtree (0 when not skipping)
+        stack: list[UIElement] = []
+        skip_depth = 0
+
+        for event, elem in events:
+            if event == "end":
+                if skip_depth:
+                    skip_depth -= 1
+                else:
+                    stack.pop()
+                elem.clear()
+                continue
+
+            if skip_depth:
+                skip_depth += 1
+                continue
+
+            # Filter first, before any string or coordinate conversion
+            visible = elem.get("visible", "true").lower() == "true"
+            if only_visible and not visible:
+                skip_depth = 1
+                continue
+
+            enabled = elem.get("enabled", "true").lower() == "true"
+            accessible = elem.get("accessible", "true").lower() == "true"
+            if only_interactable and not (enabled and accessible):
+                skip_depth = 1
+                continue
 
-        def parse_element(elem: ET.Element) -> UIElement | None:
             # Extract attributes
-            elem_type = elem.get("type", elem.tag)
+            elem_type = sys.intern(elem.get("type", elem.tag))
             label = elem.get("label") or elem.get("accessibilityLabel")
             name = elem.get("name")
             value = elem.get("value")
             identifier = elem.get("accessibilityIdentifier") or elem.get("identifier")
-            enabled = elem.get("enabled", "true").lower() == "true"
-            visible = elem.get("visible", "true").lower() == "true"
-            accessible = elem.get("accessible", "true").lower() == "true"
 
             # Get bounds
             x = int(float(elem.get("x", 0)))
@@ -199,47 +351,31 @@ class UITreeParser:
             width = int(float(elem.get("width", 0)))
             height = int(float(elem.get("height", 0)))
 
-            # Filter
-            if only_visible and not visible:
-                return None
-
-            if only_interactable:
-                if not enabled or not accessible:
-                    return None
-
-            # Create element
+            # Create element (positional: skips keyword matching per node)
             element = UIElement(
-                index=self._index_counter,
-                element_type=elem_type,
-                label=label,
-                name=name,
-                value=value,
-                identifier=identifier,
-                enabled=enabled,
-                visible=visible,
-                accessible=accessible,
-                x=x,
-                y=y,
-                width=width,
-                height=height,
+                self._index_counter,
+                elem_type,
+                label,
+                name,
+                value,
+                identifier,
+                enabled,
+                visible,
+                accessible,
+                x,
+                y,
+                width,
+                height,
             )
             self._index_counter += 1
-            flat_list.append(element)
-
-            # Parse children
-            for child_elem in elem:
-                child = parse_element(child_elem)
-                if child:
-                    element.children.append(child)
-
-            return element
-
-        try:
-            root_elem = ET.fromstring(xml_string)
-            root = parse_element(root_elem)
-            return root, flat_list
-        except ET.ParseError as e:
-            raise ValueError(f"Failed to parse XML: {e}") from e
+            if build_flat:
+                flat_list.append(element)
+            if not stack:
+                root = element
+            elif build_tree:
+                stack[-1].children.append(element)
+            stack.append(element)
+        return root, flat_list
 
     def format_tree(
         self,
@@ -258,9 +394,11 @@ class UITreeParser:
             Formatted tree string
         """
         lines: list[str] = []
+        stack: list[tuple[UIElement, int]] = [(root, 0)]
 
-        def format_element(elem: UIElement, depth: int = 0) -> None:
-            indent = "  " * depth
+        while stack:
+            elem, depth = stack.pop()
+            indent = _INDENTS[depth] if depth < len(_INDENTS) else "  " * depth
             text = elem.display_text
             text_part = f' "{text}"' if text else ""
 
@@ -270,10 +408,9 @@ class UITreeParser:
             else:
                 lines.append(f"{indent}[{elem.index}] {elem.element_type}{text_part}")
 
-            for child in elem.children:
-                format_element(child, depth + 1)
+            if elem.children:
+                stack.extend((child, depth + 1) for child in reversed(elem.children))
 
-        format_element(root)
         return "\n".join(lines)
 
     def format_flat_list(self, elements: list[UIElement], verbose: bool = False) -> str:
@@ -307,12 +444,54 @@ class UITreeParser:
         return "\n".join(lines)
 
 
+class ElementIndex:
+    """Lookup tables over a flat element list for repeated predicate queries.
+
+    Buckets keep document order, so "Nth match" selection is the same as a
+    linear scan. The tables are built in one pass on the first query.
+    """
+
+    def __init__(self, elements: list[UIElement]):
+        self.elements = elements
+        self._by_type: dict[str, list[UIElement]] | None = None
+        self._by_identifier: dict[str, list[UIElement]] = {}
+        self._by_label: dict[str, list[UIElement]] = {}
+
+    def _build(self) -> dict[str, list[UIElement]]:
+        by_type: dict[str, list[UIElement]] = {}
+        for elem in self.elements:
+            by_type.setdefault(_type_key(elem.element_type), []).append(elem)
+            if elem.identifier:
+                self._by_identifier.setdefault(elem.identifier, []).append(elem)
+            if elem.label:
+                self._by_label.setdefault(elem.label, []).append(elem)
+        self._by_type = by_type
+        return by_type
+
+    def candidates(self, predicate: dict[str, Any]) -> list[UIElement]:
+        """Return the smallest bucket that every match for the predicate belongs to."""
+        by_type = self._by_type if self._by_type is not None else self._build()
+        buckets: list[list[UIElement]] = []
+        if identifier := predicate.get("identifier"):
+            buckets.append(self._by_identifier.get(identifier, []))
+        if elem_type := predicate.get("type"):
+            buckets.append(by_type.get(_type_key(elem_type), []))
+        if label := predicate.get("label"):
+            buckets.append(self._by_label.get(label, []))
+        if not buckets:
+            return self.elements
+        return min(buckets, key=len)
+
+
 def find_element_by_predicate(
-    elements: list[UIElement],
+    elements: list[UIElement] | ElementIndex,
     predicate: dict[str, Any],
 ) -> UIElement | None:
     """Find an element matching the predicate.
 
+    Pass an ElementIndex instead of a plain list when several predicates are
+    resolved against the same snapshot; only its candidate bucket is scanned.
+
     Predicate fields:
         - text: Exact text match (label, name, or value)
         - text_contains: Contains substring (case-insensitive)
@@ -323,6 +502,9 @@ def find_element_by_predicate(
         - index: Select Nth match (0-based)
         - bounds_hint: Screen region (top_half, bottom_half, center, etc.)
     """
+    if isinstance(elements, ElementIndex):
+        elements = elements.candidates(predicate)
+
     text = predicate.get("text")
     text_contains = predicate.get("text_contains")
     text_starts_with = predicate.get("text_starts_with")
@@ -332,52 +514,45 @@ def find_element_by_predicate(
     select_index = predicate.get("index", 0)
     bounds_hint = predicate.get("bounds_hint")
 
+    # Normalize query strings once rather than per element
+    elem_type_key = _type_key(elem_type) if elem_type else None
+    text_contains_lower = text_contains.lower() if text_contains else None
+    text_starts_with_lower = text_starts_with.lower() if text_starts_with else None
+
     matches: list[UIElement] = []
 
+    need_text = bool(text or text_contains_lower or text_starts_with_lower)
+    hint_ok = _BOUNDS_HINTS.get(bounds_hint) if bounds_hint else None
+
+    # Cheapest, most selective checks first
     for elem in elements:
+        # Identifier filter
+        if identifier and elem.identifier != identifier:
+            continue
+
         # Type filter
-        if elem_type and elem.element_type.lower() != elem_type.lower():
+        if elem_type_key and _type_key(elem.element_type) is not elem_type_key:
             continue
 
         # Label filter
         if label and elem.label != label:
             continue
 
-        # Identifier filter
-        if identifier and elem.identifier != identifier:
-            continue
-
-        # Text matching
-        elem_text = elem.display_text.lower()
-
-        if text:
-            if elem.display_text != text:
-                continue
-
-        if text_contains:
-            if text_contains.lower() not in elem_text:
-                continue
-
-        if text_starts_with:
-            if not elem_text.startswith(text_starts_with.lower()):
+        # Text matching - display_text is only resolved when a text predicate is set
+        if need_text:
+            display_text = elem.display_text
+            if text and display_text != text:
                 continue
+            if text_contains_lower or text_starts_with_lower:
+                elem_text = display_text.lower()
+                if text_contains_lower and text_contains_lower not in elem_text:
+                    continue
+                if text_starts_with_lower and not elem_text.startswith(text_starts_with_lower):
+                    continue
 
         # Bounds hint filter
-        if bounds_hint:
-            # Assume screen is roughly 390x844 (iPhone 14 Pro)
-            # This is a simplification - real implementation would get screen size
-            center_x, center_y = elem.center_x, elem.center_y
-            if bounds_hint == "top_half" and center_y > 422:
-                continue
-            elif bounds_hint == "bottom_half" and center_y <= 422:
-                continue
-            elif bounds_hint == "left_half" and center_x > 195:
-                continue
-            elif bounds_hint == "right_half" and center_x <= 195:
-                continue
-            elif bounds_hint == "center":
-                if not (150 < center_x < 240 and 300 < center_y < 544):
-                    continue
+        if hint_ok is not None and not hint_ok(elem.center_x, elem.center_y):
+            continue
 
         matches.append(elem)
 
@@ -2,20 +2,142 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import json
 import logging
+import time
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Awaitable, Callable, Literal
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:  # Optional speedup: pip install -e ".[fast]"
+    pybase64 = None
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_WDA_PORT = 8100
 DEFAULT_TIMEOUT = 60.0
-
-
-@dataclass
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+# Tighter read timeouts (seconds) for endpoints that answer quickly, matched on
+# the path tail; everything else, including gestures whose duration varies and
+# app launches, keeps DEFAULT_TIMEOUT
+ENDPOINT_TIMEOUTS: dict[str, float] = {
+    "/status": 2.0,
+    "/alert/text": 5.0,
+    "/window/size": 5.0,
+    "/orientation": 5.0,
+    "/screenshot": 10.0,
+    "/source": 30.0,
+}
+
+# How long rarely-changing WDA answers are reused (seconds)
+STATUS_TTL = 1.0  # positive health checks only
+WINDOW_SIZE_TTL = 5.0
+APPEARANCE_TTL = 2.0
+
+# Keep-alive pool shared by all WDA clients
+POOL_LIMITS = httpx.Limits(
+    max_connections=25,
+    max_keepalive_connections=25,
+    keepalive_expiry=60.0,
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a keep-alive HTTP client suitable for sharing across WDA clients."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=DEFAULT_CONNECT_TIMEOUT),
+        limits=POOL_LIMITS,
+    )
+
+
+def _endpoint_timeout(path: str) -> float | None:
+    """Return the ENDPOINT_TIMEOUTS entry for a request path, ignoring its query."""
+    tail = path.partition("?")[0]
+    for suffix, timeout in ENDPOINT_TIMEOUTS.items():
+        if tail.endswith(suffix):
+            return timeout
+    return None
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode WDA base64 payloads (SIMD-accelerated when pybase64 is installed)."""
+    if pybase64 is not None:
+        return pybase64.b64decode(data)
+    return base64.b64decode(data)
+
+
+def _b64encode(data: bytes) -> str:
+    """Encode a payload for WDA as a base64 string."""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode()
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# WebDriver error codes meaning the endpoint itself is missing from this WDA build
+_UNSUPPORTED_ERRORS = frozenset({"unknown command", "unknown method", "unsupported operation"})
+
+
+def _actions_template(*steps: dict[str, Any]) -> bytes:
+    """Serialize a one-finger W3C action chain once; "%d" strings become %d slots."""
+    body = {
+        "actions": [
+            {
+                "type": "pointer",
+                "id": "finger1",
+                "parameters": {"pointerType": "touch"},
+                "actions": list(steps),
+            }
+        ]
+    }
+    return json.dumps(body, separators=(",", ":")).replace('"%d"', "%d").encode()
+
+
+# Gesture bodies are constant apart from coordinates and durations, so they are
+# filled in with one bytes % instead of building and encoding dicts per call
+_TAP_ACTIONS = _actions_template(
+    {"type": "pointerMove", "duration": 0, "x": "%d", "y": "%d"},
+    {"type": "pointerDown", "button": 0},
+    {"type": "pause", "duration": 50},
+    {"type": "pointerUp", "button": 0},
+)
+_DOUBLE_TAP_ACTIONS = _actions_template(
+    {"type": "pointerMove", "duration": 0, "x": "%d", "y": "%d"},
+    {"type": "pointerDown", "button": 0},
+    {"type": "pause", "duration": 50},
+    {"type": "pointerUp", "button": 0},
+    {"type": "pause", "duration": 100},
+    {"type": "pointerDown", "button": 0},
+    {"type": "pause", "duration": 50},
+    {"type": "pointerUp", "button": 0},
+)
+_LONG_PRESS_ACTIONS = _actions_template(
+    {"type": "pointerMove", "duration": 0, "x": "%d", "y": "%d"},
+    {"type": "pointerDown", "button": 0},
+    {"type": "pause", "duration": "%d"},
+    {"type": "pointerUp", "button": 0},
+)
+_SWIPE_ACTIONS = _actions_template(
+    {"type": "pointerMove", "duration": 0, "x": "%d", "y": "%d"},
+    {"type": "pointerDown", "button": 0},
+    {"type": "pointerMove", "duration": "%d", "x": "%d", "y": "%d"},
+    {"type": "pointerUp", "button": 0},
+)
+
+
+@dataclass(slots=True, frozen=True)
 class WDAElement:
     """Represents a UI element from WebDriverAgent."""
 
@@ -56,25 +178,52 @@ class WDAClient:
     that runs on the device/simulator.
     """
 
-    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_WDA_PORT):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_WDA_PORT,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            host: WDA host
+            port: WDA port
+            http_client: Shared HTTP client to reuse pooled keep-alive connections.
+                The caller owns it; close() leaves it open.
+        """
         self.base_url = f"http://{host}:{port}"
         self.session_id: str | None = None
-        self._client: httpx.AsyncClient | None = None
+        self._client: httpx.AsyncClient | None = http_client
+        self._owns_client = http_client is None
+        # Background DELETE /actions scheduled after a tap
+        self._release_task: asyncio.Task[None] | None = None
+        # key -> (monotonic time, value) for _cached_get
+        self._info_cache: dict[str, tuple[float, Any]] = {}
+        # Identical GETs in flight, by path; see _shared_get
+        self._inflight: dict[str, asyncio.Task[dict[str, Any]]] = {}
+        # Which gesture API this WDA build accepts; see _perform_gesture
+        self._actions_strategy: Literal["unknown", "w3c", "legacy"] = "unknown"
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=DEFAULT_TIMEOUT,
-            )
+            if self._client is not None and not self._owns_client:
+                # Recreating hides pool churn; the shared client should outlive us
+                logger.warning(
+                    f"Shared HTTP client closed; opening a private one for {self.base_url}"
+                )
+            self._client = create_http_client()
+            self._owns_client = True
         return self._client
 
     async def close(self) -> None:
-        """Close the HTTP client."""
-        if self._client and not self._client.is_closed:
+        """Close the HTTP client (unless it is shared)."""
+        if self._release_task is not None and not self._release_task.done():
+            self._release_task.cancel()
+        if self._owns_client and self._client and not self._client.is_closed:
             await self._client.aclose()
-            self._client = None
+        self._client = None
 
     async def _request(
         self,
@@ -82,19 +231,31 @@ class WDAClient:
         path: str,
         json: dict[str, Any] | None = None,
         timeout: float | None = None,
+        content: bytes | None = None,
     ) -> dict[str, Any]:
-        """Make HTTP request to WDA."""
+        """Make HTTP request to WDA.
+
+        Pass either a json dict or an already serialized JSON content body.
+        Without an explicit timeout, ENDPOINT_TIMEOUTS applies where it matches.
+        """
         client = await self._get_client()
         kwargs: dict[str, Any] = {}
+        if json is not None and orjson is not None:
+            content, json = orjson.dumps(json), None
         if json is not None:
             kwargs["json"] = json
+        elif content is not None:
+            kwargs["content"] = content
+            kwargs["headers"] = _JSON_HEADERS
+        if timeout is None:
+            timeout = _endpoint_timeout(path)
         if timeout is not None:
-            kwargs["timeout"] = timeout
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=DEFAULT_CONNECT_TIMEOUT)
 
-        logger.debug(f"WDA request: {method} {path} json={json}")
+        logger.debug(f"WDA request: {method} {path} json={json if content is None else content}")
 
         try:
-            response = await client.request(method, path, **kwargs)
+            response = await client.request(method, self.base_url + path, **kwargs)
         except httpx.ConnectError as e:
             raise WDAError(
                 f"Cannot connect to WebDriverAgent at {self.base_url}. "
@@ -103,8 +264,17 @@ class WDAClient:
         except httpx.TimeoutException as e:
             raise WDAError(f"Request timed out: {path}") from e
 
+        # Bodiless replies (e.g. some DELETEs) skip the JSON decoder and its exception
+        if not response.content:
+            if response.status_code >= 400:
+                raise WDAError(
+                    f"WDA request failed: {response.status_code} - ",
+                    status_code=response.status_code,
+                )
+            return {"value": ""}
+
         try:
-            data = response.json()
+            data = orjson.loads(response.content) if orjson is not None else response.json()
         except Exception:
             if response.status_code >= 400:
                 raise WDAError(
@@ -115,32 +285,25 @@ class WDAClient:
 
         logger.debug(f"WDA response: status={response.status_code} data={data}")
 
-        # WDA returns errors in the response body with various formats
-        # Check for WebDriver protocol error format
+        # WDA returns errors in the response body with various formats, even
+        # alongside a 2xx status, so successful replies are still inspected
         if isinstance(data, dict):
-            # Standard WebDriver error format
-            if "error" in data and data["error"]:
-                error_msg = data.get("error", "Unknown error")
-                error_details = data.get("message", "")
-                if error_details:
-                    error_msg = f"{error_msg}: {error_details}"
-                raise WDAError(
-                    f"WDA error: {error_msg}",
-                    status_code=response.status_code,
-                    error=data.get("error"),
-                )
-
-            # WDA-specific error format (status != 0)
             value = data.get("value", {})
-            if isinstance(value, dict) and value.get("error"):
-                error_msg = value.get("error", "Unknown error")
-                error_details = value.get("message", "")
-                if error_details:
-                    error_msg = f"{error_msg}: {error_details}"
+            # Standard WebDriver error format, or WDA's nested under "value"
+            if data.get("error"):
+                error_data = data
+            elif isinstance(value, dict) and value.get("error"):
+                error_data = value
+            else:
+                error_data = None
+            if error_data is not None:
+                error = error_data["error"]
+                error_details = error_data.get("message", "")
+                error_msg = f"{error}: {error_details}" if error_details else error
                 raise WDAError(
                     f"WDA error: {error_msg}",
                     status_code=response.status_code,
-                    error=value.get("error"),
+                    error=error,
                 )
 
             # Check status field (older WDA format)
@@ -161,16 +324,58 @@ class WDAClient:
 
         return data
 
+    async def _shared_get(self, path: str) -> dict[str, Any]:
+        """GET a read-only endpoint, joining an identical request already in flight.
+
+        Concurrent tool calls that ask for the same status, size or
+        orientation share one HTTP round trip. Screen-dependent reads (source,
+        alert text) are never joined: a request that began before a tap would
+        hand its caller the screen from before the tap.
+        """
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.create_task(self._request("GET", path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda done: self._clear_inflight(path, done))
+        # Shielded so one cancelled caller does not cancel the request for the rest
+        return await asyncio.shield(task)
+
+    def _clear_inflight(self, path: str, task: asyncio.Task[dict[str, Any]]) -> None:
+        if self._inflight.get(path) is task:
+            del self._inflight[path]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every waiter was cancelled
+
+    async def _cached_get(
+        self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return a cached answer younger than ttl, otherwise fetch and cache it."""
+        cached = self._info_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        value = await fetch()
+        self._info_cache[key] = (time.monotonic(), value)
+        return value
+
+    def clear_cache(self) -> None:
+        """Drop cached status, window size and appearance answers."""
+        self._info_cache.clear()
+
     async def get_status(self) -> dict[str, Any]:
         """Get WDA server status."""
-        return await self._request("GET", "/status")
+        return await self._shared_get("/status")
 
     async def health_check(self) -> bool:
-        """Check if WDA is responsive."""
+        """Check if WDA is responsive.
+
+        A positive answer is reused for STATUS_TTL so polling loops do not
+        flood WDA; failures are never cached.
+        """
         try:
-            await self.get_status()
+            await self._cached_get("status", STATUS_TTL, self.get_status)
             return True
         except Exception:
+            self._info_cache.pop("status", None)
             return False
 
     async def create_session(self, capabilities: dict[str, Any] | None = None) -> str:
@@ -202,6 +407,27 @@ class WDAClient:
                 logger.warning(f"Error deleting session: {e}")
             self.session_id = None
 
+    async def reset_and_create_session(
+        self, capabilities: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Replace the current session with a fresh one.
+
+        POST /session doubles as the health check, so no separate /status
+        round-trip is made; failing to reach WDA reports it as unhealthy.
+
+        Returns:
+            {"status": "ok" | "unhealthy", "session_id": str | None}
+        """
+        await self.delete_session()
+        self.reset_strategy()
+        try:
+            session_id = await self.create_session(capabilities)
+        except WDAError as e:
+            if e.status_code is not None:
+                raise
+            return {"status": "unhealthy", "session_id": None}
+        return {"status": "ok", "session_id": session_id}
+
     async def _ensure_session(self) -> str:
         """Ensure we have an active session."""
         if not self.session_id:
@@ -217,7 +443,7 @@ class WDAClient:
         b64_data = data.get("value", "")
         if not b64_data:
             raise WDAError("No screenshot data returned")
-        return base64.b64decode(b64_data)
+        return _b64decode(b64_data)
 
     # === UI Hierarchy ===
 
@@ -241,10 +467,14 @@ class WDAClient:
     # === Window/Screen Info ===
 
     async def get_window_size(self) -> dict[str, int]:
-        """Get the window size."""
-        session_id = await self._ensure_session()
-        data = await self._request("GET", f"/session/{session_id}/window/size")
-        return data.get("value", {"width": 0, "height": 0})
+        """Get the window size (cached for WINDOW_SIZE_TTL, reset by set_orientation)."""
+
+        async def fetch() -> dict[str, int]:
+            session_id = await self._ensure_session()
+            data = await self._shared_get(f"/session/{session_id}/window/size")
+            return data.get("value", {"width": 0, "height": 0})
+
+        return await self._cached_get("window_size", WINDOW_SIZE_TTL, fetch)
 
     # === Element Finding ===
 
@@ -324,6 +554,20 @@ class WDAClient:
         )
         return data.get("value", {"x": 0, "y": 0, "width": 0, "height": 0})
 
+    async def find_many(
+        self, queries: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[WDAElement]]:
+        """Run several (using, value) locator queries concurrently.
+
+        Duplicate queries are sent once, so the lookup costs about one round
+        trip of wall-clock time however many locators are asked for.
+        """
+        unique = list(dict.fromkeys(queries))
+        results = await asyncio.gather(
+            *(self.find_elements(using, value) for using, value in unique)
+        )
+        return dict(zip(unique, results))
+
     # === Element Actions ===
 
     async def click_element(self, element_id: str) -> None:
@@ -341,7 +585,7 @@ class WDAClient:
         await self._request(
             "POST",
             f"/session/{session_id}/element/{element_id}/value",
-            json={"value": list(text)},
+            json={"value": [text]},
         )
 
     async def clear_element(self, element_id: str) -> None:
@@ -364,46 +608,85 @@ class WDAClient:
                 "DELETE",
                 f"/session/{self.session_id}/actions",
             )
-        except WDAError:
+        except (WDAError, httpx.HTTPError):
             pass  # Ignore errors, this is cleanup
 
-    async def tap(self, x: int, y: int) -> None:
-        """Tap at coordinates using W3C actions API."""
+    def _schedule_release_actions(self) -> None:
+        """Release pointer inputs without making the caller wait for the round trip.
+
+        The action chain already ended with pointerUp, so the DELETE is only
+        belt-and-braces cleanup; at most one is kept in flight.
+        """
+        if self._release_task is None or self._release_task.done():
+            self._release_task = asyncio.create_task(self.release_actions())
+
+    async def _await_pending_release(self) -> None:
+        """Let a background release land before the next action chain starts.
+
+        Otherwise the DELETE /actions could reach WDA mid-gesture and lift
+        the new gesture's pointer.
+        """
+        task = self._release_task
+        if task is not None and not task.done():
+            await task
+
+    async def perform_actions(self, sources: list[dict[str, Any]]) -> None:
+        """Perform several W3C input sources (e.g. two fingers) in one request.
+
+        Args:
+            sources: Input source dicts, each with "type", "id" and "actions"
+        """
         session_id = await self._ensure_session()
+        await self._await_pending_release()
+        await self._request(
+            "POST",
+            f"/session/{session_id}/actions",
+            json={"actions": sources},
+        )
 
-        # Use W3C actions API (more reliable)
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x, "y": y},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 50},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
+    def reset_strategy(self) -> None:
+        """Forget which gesture API this WDA build supports (e.g. after reconnecting)."""
+        self._actions_strategy = "unknown"
 
-        try:
-            await self._request(
-                "POST",
-                f"/session/{session_id}/actions",
-                json=actions,
-            )
-            # Clean up actions
-            await self.release_actions()
-        except WDAError as e:
-            # Fallback to WDA-specific tap endpoint
-            logger.debug(f"W3C actions failed, trying WDA tap: {e}")
-            await self._request(
-                "POST",
-                f"/session/{session_id}/wda/tap/0",
-                json={"x": x, "y": y},
-            )
+    async def _perform_gesture(
+        self,
+        session_id: str,
+        actions: bytes,
+        legacy_path: str,
+        legacy_json: dict[str, Any],
+    ) -> bool:
+        """Run a W3C action chain, falling back to a legacy WDA gesture endpoint.
+
+        Once W3C actions turn out to be unsupported by this WDA build, later
+        gestures go straight to the legacy endpoint instead of paying for a
+        failed round trip each time. Other W3C failures fall back just once.
+
+        Returns:
+            True if the W3C actions API performed the gesture
+        """
+        await self._await_pending_release()
+        if self._actions_strategy != "legacy":
+            try:
+                await self._request("POST", f"/session/{session_id}/actions", content=actions)
+                self._actions_strategy = "w3c"
+                return True
+            except WDAError as e:
+                # A bare 404 means no route; session errors such as "invalid session id"
+                # also come back as 404 but say nothing about the actions API
+                if e.error in _UNSUPPORTED_ERRORS or (e.status_code == 404 and not e.error):
+                    self._actions_strategy = "legacy"
+                logger.debug(f"W3C actions failed, trying WDA {legacy_path}: {e}")
+        await self._request("POST", f"/session/{session_id}{legacy_path}", json=legacy_json)
+        return False
+
+    async def tap(self, x: int, y: int) -> None:
+        """Tap at coordinates using W3C actions API."""
+        session_id = await self._ensure_session()
+        if await self._perform_gesture(
+            session_id, _TAP_ACTIONS % (x, y), "/wda/tap/0", {"x": x, "y": y}
+        ):
+            # Clean up actions in the background
+            self._schedule_release_actions()
 
     async def tap_wda(self, x: int, y: int) -> None:
         """Tap at coordinates using WDA-specific endpoint (legacy)."""
@@ -417,78 +700,21 @@ class WDAClient:
     async def double_tap(self, x: int, y: int) -> None:
         """Double tap at coordinates using W3C actions API."""
         session_id = await self._ensure_session()
-
         # Two quick taps
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x, "y": y},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 50},
-                        {"type": "pointerUp", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 50},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        try:
-            await self._request(
-                "POST",
-                f"/session/{session_id}/actions",
-                json=actions,
-            )
-        except WDAError as e:
-            # Fallback to WDA-specific endpoint
-            logger.debug(f"W3C actions failed, trying WDA doubleTap: {e}")
-            await self._request(
-                "POST",
-                f"/session/{session_id}/wda/doubleTap",
-                json={"x": x, "y": y},
-            )
+        await self._perform_gesture(
+            session_id, _DOUBLE_TAP_ACTIONS % (x, y), "/wda/doubleTap", {"x": x, "y": y}
+        )
 
     async def long_press(self, x: int, y: int, duration: float = 1.0) -> None:
         """Long press at coordinates using W3C actions API."""
         session_id = await self._ensure_session()
         duration_ms = int(duration * 1000)
-
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x, "y": y},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": duration_ms},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        try:
-            await self._request(
-                "POST",
-                f"/session/{session_id}/actions",
-                json=actions,
-            )
-        except WDAError as e:
-            # Fallback to WDA-specific endpoint
-            logger.debug(f"W3C actions failed, trying WDA touchAndHold: {e}")
-            await self._request(
-                "POST",
-                f"/session/{session_id}/wda/touchAndHold",
-                json={"x": x, "y": y, "duration": duration},
-            )
+        await self._perform_gesture(
+            session_id,
+            _LONG_PRESS_ACTIONS % (x, y, duration_ms),
+            "/wda/touchAndHold",
+            {"x": x, "y": y, "duration": duration},
+        )
 
     async def swipe(
         self,
@@ -504,43 +730,18 @@ class WDAClient:
         # Duration in milliseconds
         duration_ms = int(duration * 1000)
 
-        # Use W3C actions API
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": from_x, "y": from_y},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pointerMove", "duration": duration_ms, "x": to_x, "y": to_y},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        try:
-            await self._request(
-                "POST",
-                f"/session/{session_id}/actions",
-                json=actions,
-            )
-        except WDAError as e:
-            # Fallback to WDA-specific endpoint
-            logger.debug(f"W3C actions failed, trying WDA drag: {e}")
-            await self._request(
-                "POST",
-                f"/session/{session_id}/wda/dragfromtoforduration",
-                json={
-                    "fromX": from_x,
-                    "fromY": from_y,
-                    "toX": to_x,
-                    "toY": to_y,
-                    "duration": duration,
-                },
-            )
+        await self._perform_gesture(
+            session_id,
+            _SWIPE_ACTIONS % (from_x, from_y, duration_ms, to_x, to_y),
+            "/wda/dragfromtoforduration",
+            {
+                "fromX": from_x,
+                "fromY": from_y,
+                "toX": to_x,
+                "toY": to_y,
+                "duration": duration,
+            },
+        )
 
     # === Keyboard ===
 
@@ -550,7 +751,7 @@ class WDAClient:
         await self._request(
             "POST",
             f"/session/{session_id}/wda/keys",
-            json={"value": list(text)},
+            json={"value": [text]},
         )
 
     async def press_button(self, button: str) -> None:
@@ -654,7 +855,7 @@ class WDAClient:
     async def get_orientation(self) -> str:
         """Get device orientation."""
         session_id = await self._ensure_session()
-        data = await self._request("GET", f"/session/{session_id}/orientation")
+        data = await self._shared_get(f"/session/{session_id}/orientation")
         return data.get("value", "PORTRAIT")
 
     async def set_orientation(self, orientation: str) -> None:
@@ -664,6 +865,7 @@ class WDAClient:
             orientation: 'PORTRAIT' or 'LANDSCAPE'
         """
         session_id = await self._ensure_session()
+        self._info_cache.pop("window_size", None)
         await self._request(
             "POST",
             f"/session/{session_id}/orientation",
@@ -679,7 +881,7 @@ class WDAClient:
             "POST",
             f"/session/{session_id}/wda/setPasteboard",
             json={
-                "content": base64.b64encode(content.encode()).decode(),
+                "content": _b64encode(content.encode()),
                 "contentType": content_type,
             },
         )
@@ -694,7 +896,7 @@ class WDAClient:
         )
         b64_content = data.get("value", "")
         if b64_content:
-            return base64.b64decode(b64_content).decode()
+            return _b64decode(b64_content).decode()
         return ""
 
     # === Keyboard ===
@@ -708,6 +910,31 @@ class WDAClient:
             json={},
         )
 
+    async def wait_for_keyboard(self, timeout: float = 1.0, interval: float = 0.05) -> bool:
+        """Poll until the on-screen keyboard is shown.
+
+        Args:
+            timeout: Maximum time to wait in seconds, including in-flight requests
+            interval: Delay between polls in seconds
+
+        Returns:
+            True if the keyboard appeared before the timeout
+        """
+
+        async def poll() -> bool:
+            while True:
+                try:
+                    if await self.find_elements("class name", "XCUIElementTypeKeyboard"):
+                        return True
+                except WDAError:
+                    pass
+                await asyncio.sleep(interval)
+
+        try:
+            return await asyncio.wait_for(poll(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
     # === Device Appearance ===
 
     async def set_appearance(self, appearance: str) -> None:
@@ -717,6 +944,7 @@ class WDAClient:
             appearance: 'dark' or 'light'
         """
         # This endpoint is session-less (.withoutSession in WDA)
+        self._info_cache.pop("appearance", None)
         await self._request(
             "POST",
             "/wda/device/appearance",
@@ -724,14 +952,15 @@ class WDAClient:
         )
 
     async def get_appearance(self) -> str:
-        """Get current device appearance."""
-        # Get appearance from device info (session-less endpoint)
-        data = await self._request(
-            "GET",
-            "/wda/device/info",
-        )
-        value = data.get("value", {})
-        return value.get("userInterfaceStyle", "unknown")
+        """Get current device appearance (cached for APPEARANCE_TTL, reset by set_appearance)."""
+
+        async def fetch() -> str:
+            # Get appearance from device info (session-less endpoint)
+            data = await self._shared_get("/wda/device/info")
+            value = data.get("value", {})
+            return value.get("userInterfaceStyle", "unknown")
+
+        return await self._cached_get("appearance", APPEARANCE_TTL, fetch)
 
     # === Biometrics (Touch ID / Face ID) ===
 
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from mobile_pilot_mcp.dashboard import DashboardState
+
+
+class FakeWebSocket:
+    def __init__(self, fail: bool = False, delay: float = 0.0) -> None:
+        self.fail = fail
+        self.delay = delay
+        self.sent: list[bytes] = []
+
+    async def send_bytes(self, data: bytes) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionResetError("client went away")
+        self.sent.append(data)
+
+
+def test_broadcast_prunes_dead_clients() -> None:
+    state = DashboardState()
+    alive = FakeWebSocket()
+    dead = FakeWebSocket(fail=True)
+    state.websockets = {alive, dead}
+
+    asyncio.run(state._broadcast({"type": "ping", "data": 1}))
+
+    assert state.websockets == {alive}
+    assert json.loads(alive.sent[0]) == {"type": "ping", "data": 1}
+
+
+def test_broadcast_sends_concurrently() -> None:
+    state = DashboardState()
+    clients = {FakeWebSocket(delay=0.05) for _ in range(5)}
+    state.websockets = set(clients)
+
+    async def run() -> float:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await state._broadcast({"type": "ping"})
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+
+    assert elapsed < 0.2
+    assert all(len(ws.sent) == 1 for ws in clients)
+
+
+def test_queued_messages_are_batched_into_one_frame() -> None:
+    state = DashboardState()
+    ws = FakeWebSocket()
+    state.websockets = {ws}
+
+    async def run() -> None:
+        state.update_wda_status({"ready": True})
+        state.update_device_info({"udid": "ABC"})
+        state.start_broadcaster()
+        await asyncio.sleep(0.01)
+        await state.stop_broadcaster()
+
+    asyncio.run(run())
+
+    assert len(ws.sent) == 1
+    frame = json.loads(ws.sent[0])
+    assert [msg["type"] for msg in frame] == ["wda_status", "device_info"]
+
+
+def test_outbox_drops_oldest_when_full(monkeypatch) -> None:
+    from mobile_pilot_mcp import dashboard
+
+    monkeypatch.setattr(dashboard, "OUTBOX_MAX_SIZE", 2)
+    state = DashboardState()
+    state.websockets = {FakeWebSocket()}
+
+    for i in range(3):
+        state.update_wda_status({"n": i})
+
+    outbox = state._get_outbox()
+    assert [outbox.get_nowait()["data"]["n"] for _ in range(2)] == [1, 2]
+
+
+def test_tool_call_dict_is_cached_until_completed() -> None:
+    state = DashboardState()
+    call = state.add_tool_call("tap", {"x": 1, "y": 2})
+
+    pending = call.to_dict()
+    assert call.to_dict() is pending
+
+    state.complete_tool_call(call, result="Tapped")
+    completed = call.to_dict()
+
+    assert completed is not pending
+    assert pending["status"] == "pending"
+    assert completed["status"] == "success"
+    assert completed["result"] == "Tapped"
+
+
+async def test_screenshot_is_served_from_file_with_conditional_get(tmp_path, monkeypatch) -> None:
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from mobile_pilot_mcp import dashboard
+
+    shot = tmp_path / "screenshot.jpg"
+    shot.write_bytes(b"\xff\xd8fake-jpeg\xff\xd9")
+    monkeypatch.setattr(dashboard.dashboard_state, "last_screenshot", str(shot))
+
+    async with TestClient(TestServer(dashboard.create_dashboard_app())) as client:
+        resp = await client.get("/screenshot")
+        assert resp.status == 200
+        assert resp.headers["Content-Type"] == "image/jpeg"
+        assert await resp.read() == shot.read_bytes()
+
+        etag = resp.headers["ETag"]
+        resp = await client.get("/screenshot", headers={"If-None-Match": etag})
+        assert resp.status == 304
+
+
+async def test_action_endpoint_round_trips_json() -> None:
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from mobile_pilot_mcp import dashboard
+
+    async def executor(name: str, args: dict) -> str:
+        return f"{name}:{args['x']}"
+
+    state = dashboard.dashboard_state
+    previous = state.tool_executor
+    state.tool_executor = executor
+    try:
+        async with TestClient(TestServer(dashboard.create_dashboard_app())) as client:
+            resp = await client.post("/api/action", json={"tool": "tap", "args": {"x": 3}})
+            assert resp.status == 200
+            assert await resp.json() == {"success": True, "result": "tap:3"}
+
+            resp = await client.post("/api/action", data=b"{not json")
+            assert resp.status == 400
+            assert (await resp.json())["error"] == "Invalid JSON"
+    finally:
+        state.tool_executor = previous
+
+
+def test_json_helpers_fall_back_to_stdlib(monkeypatch) -> None:
+    from mobile_pilot_mcp import dashboard
+
+    monkeypatch.setattr(dashboard, "orjson", None)
+
+    payload = dashboard._json_dumps({"type": "ping", "data": [1, "é"]})
+    assert isinstance(payload, bytes)
+    assert dashboard._json_loads(payload) == {"type": "ping", "data": [1, "é"]}
+
+
+def test_tool_calls_are_bounded_and_state_returns_latest() -> None:
+    state = DashboardState(max_calls=60)
+    for i in range(75):
+        state.add_tool_call("tap", {"i": i})
+
+    assert len(state.tool_calls) == 60
+    calls = state.get_state()["tool_calls"]
+    assert len(calls) == 50
+    assert calls[0]["arguments"] == {"i": 25}
+    assert calls[-1]["arguments"] == {"i": 74}
+
+
+def test_completed_result_is_truncated_once() -> None:
+    from mobile_pilot_mcp.dashboard import RESULT_PREVIEW_CHARS
+
+    state = DashboardState()
+    call = state.add_tool_call("get_ui_tree", {})
+    state.complete_tool_call(call, result="x" * (RESULT_PREVIEW_CHARS + 100))
+
+    assert call.result_preview == "x" * RESULT_PREVIEW_CHARS
+    assert call.to_dict()["result"] is call.result_preview
+    assert len(call.result) == RESULT_PREVIEW_CHARS + 100
+
+
+async def test_websocket_connections_are_capped(monkeypatch) -> None:
+    import aiohttp
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from mobile_pilot_mcp import dashboard
+
+    monkeypatch.setattr(dashboard, "MAX_WS_CLIENTS", 1)
+    monkeypatch.setattr(dashboard.dashboard_state, "websockets", set())
+
+    async with TestClient(TestServer(dashboard.create_dashboard_app())) as client:
+        first = await client.ws_connect("/ws")
+        init = await first.receive_bytes()
+        assert json.loads(init)["type"] == "init"
+
+        with pytest.raises(aiohttp.WSServerHandshakeError) as excinfo:
+            await client.ws_connect("/ws")
+        assert excinfo.value.status == 503
+
+        await first.close()
+
+
+def test_events_are_not_queued_without_subscribers() -> None:
+    state = DashboardState()
+    call = state.add_tool_call("tap", {})
+    state.complete_tool_call(call, result="ok")
+    state.update_device_info({"udid": "ABC"})
+
+    assert state._outbox is None
+    assert state.device_info == {"udid": "ABC"}
+
+
+def test_state_bytes_are_cached_until_mutation() -> None:
+    state = DashboardState()
+    state._state_cache_ttl = 60.0
+
+    first = state.get_state_bytes()
+    assert state.get_state_bytes() is first
+
+    state.update_wda_status({"ready": True})
+    second = state.get_state_bytes()
+    assert second is not first
+    assert json.loads(second)["wda_status"] == {"ready": True}
+
+
+def test_long_string_arguments_are_truncated_for_display() -> None:
+    from mobile_pilot_mcp.dashboard import ARGUMENT_PREVIEW_CHARS
+
+    state = DashboardState()
+    args = {"device_id": "UDID", "text": "a" * (ARGUMENT_PREVIEW_CHARS + 5)}
+    call = state.add_tool_call("type_text", args)
+
+    shown = call.to_dict()["arguments"]
+    assert shown["text"] == "a" * ARGUMENT_PREVIEW_CHARS + "...<+5>"
+    assert shown["device_id"] == "UDID"
+    assert call.arguments is args
+    assert state.add_tool_call("tap", {"x": 1}).to_dict()["arguments"] == {"x": 1}
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mobile_pilot_mcp import server as server_module
+
+PS_LINE = "user 1 0 0 0 0 ?? S 0:00 0:01 dart run --vm http://127.0.0.1:50123/abc=/\n"
+LOG_LINE = "flutter: DTD available at ws://127.0.0.1:50200/xyz=/ws\n"
+
+
+@pytest.fixture(autouse=True)
+def no_cached_discovery(monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "_last_discovery", None)
+
+
+@pytest.fixture
+def fake_commands(monkeypatch):
+    """Replace discovery subprocesses with canned output keyed by program name.
+
+    Returns (outputs, commands): edit outputs to change what each program prints;
+    commands records the programs that were run. psutil and state files are
+    disabled so only these outputs feed discovery.
+    """
+    outputs = {"ps": "", "lsof": "", "log": ""}
+    commands: list[str] = []
+
+    async def fake_stream(cmd, on_line, timeout):
+        commands.append(cmd[0])
+        await asyncio.sleep(0.05)
+        for line in outputs[cmd[0]].splitlines(keepends=True):
+            if on_line(line):
+                break
+
+    async def no_state_files():
+        return []
+
+    monkeypatch.setattr(server_module, "psutil", None)
+    monkeypatch.setattr(server_module, "_stream_command_lines", fake_stream)
+    monkeypatch.setattr(server_module, "_scan_flutter_state_files", no_state_files)
+    return outputs, commands
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "ws://127.0.0.1:50123/AbC+d/e=/ws",
+        "http://127.0.0.1:50123/AbC+d/e=/",
+        "http://127.0.0.1:50123/AbC+d/e",
+    ],
+)
+def test_normalize_dtd_match_yields_ws_and_http_pair(raw) -> None:
+    assert server_module._normalize_dtd_match(raw) == (
+        "ws://127.0.0.1:50123/AbC+d/e=/ws",
+        "http://127.0.0.1:50123/AbC+d/e=/",
+    )
+
+
+def test_normalize_dtd_match_keeps_tls() -> None:
+    assert server_module._normalize_dtd_match("https://localhost:8181/tok=") == (
+        "wss://localhost:8181/tok=/ws",
+        "https://localhost:8181/tok=/",
+    )
+
+
+def test_dtd_uri_regex_finds_every_uri_in_a_blob() -> None:
+    blob = (
+        "flutter: The Dart VM service is listening on http://127.0.0.1:50123/abc=/\n"
+        "noise\n"
+        "DTD at ws://localhost:50200/xyz=/ws\n"
+    )
+
+    matches = [m.group() for m in server_module._DTD_URI_RE.finditer(blob)]
+
+    assert matches == ["http://127.0.0.1:50123/abc=/", "ws://localhost:50200/xyz=/"]
+
+
+async def test_discovery_commands_run_concurrently(fake_commands) -> None:
+    outputs, _ = fake_commands
+    outputs.update(ps=PS_LINE, log=LOG_LINE)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await server_module.discover_dtd_uris.fn(exhaustive=True)
+    elapsed = loop.time() - start
+
+    assert elapsed < 0.15
+    assert "ws://127.0.0.1:50123/abc=/ws" in result
+    assert "Process: dart" in result
+    assert "ws://127.0.0.1:50200/xyz=/ws" in result
+
+
+async def test_vm_ports_are_probed_concurrently(monkeypatch) -> None:
+    async def fake_probe(port, process_name, timeout):
+        await asyncio.sleep(0.05)
+        return None if port == 9001 else (f"ws://127.0.0.1:{port}/ws", "", process_name, "")
+
+    monkeypatch.setattr(server_module, "_probe_vm_port", fake_probe)
+    ports = [(9000, "dart"), (9001, "dart"), (9002, "flutter"), (9003, "dart")]
+    seen = {9003}
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    entries = await server_module._probe_vm_ports(ports, seen, timeout=1.0)
+
+    assert loop.time() - start < 0.1
+    assert [entry[0] for entry in entries] == [
+        "ws://127.0.0.1:9000/ws",
+        "ws://127.0.0.1:9002/ws",
+    ]
+
+
+async def test_flutter_state_files_are_read_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    import threading
+
+    state_dir = tmp_path / ".flutter_tool_state"
+    state_dir.mkdir()
+    (state_dir / "session").write_text("vm: http://127.0.0.1:50123/abc=/\n")
+    monkeypatch.setattr(server_module.Path, "home", lambda: tmp_path)
+
+    reader_threads: list[threading.Thread] = []
+    original = server_module._read_flutter_state_files
+
+    def recording_reader():
+        reader_threads.append(threading.current_thread())
+        return original()
+
+    monkeypatch.setattr(server_module, "_read_flutter_state_files", recording_reader)
+
+    entries = await server_module._scan_flutter_state_files()
+
+    assert reader_threads and reader_threads[0] is not threading.main_thread()
+    assert entries[0][:3] == (
+        "ws://127.0.0.1:50123/abc=/ws",
+        "http://127.0.0.1:50123/abc=/",
+        "flutter (from state file)",
+    )
+
+
+async def test_console_scan_is_skipped_once_uris_are_found(fake_commands) -> None:
+    outputs, commands = fake_commands
+    outputs.update(ps=PS_LINE, log=LOG_LINE)
+
+    result = await server_module.discover_dtd_uris.fn()
+    assert "log" not in commands
+    assert "50200" not in result
+
+    outputs["ps"] = ""
+    commands.clear()
+    server_module._last_discovery = None
+    result = await server_module.discover_dtd_uris.fn()
+    assert commands[-1] == "log"
+    assert "ws://127.0.0.1:50200/xyz=/ws" in result
+
+
+async def test_known_port_skip_is_exact_not_substring(fake_commands, monkeypatch) -> None:
+    probed: list[int] = []
+    outputs, _ = fake_commands
+    outputs["ps"] = "u 1 0 0 0 0 ?? S 0:00 0:01 dart --vm http://127.0.0.1:50123/a8080b=/\n"
+    outputs["lsof"] = (
+        "dart 1 u 5u IPv4 0 0t0 TCP 127.0.0.1:8080\n"
+        "dart 1 u 6u IPv4 0 0t0 TCP 127.0.0.1:50123\n"
+    )
+
+    async def fake_probe(port, process_name, timeout):
+        probed.append(port)
+        return None
+
+    monkeypatch.setattr(server_module, "_probe_vm_port", fake_probe)
+
+    await server_module.discover_dtd_uris.fn(exhaustive=True)
+
+    assert probed == [8080]
+
+
+async def test_process_scan_uses_psutil_when_available(monkeypatch) -> None:
+    import types
+
+    class FakeProcess:
+        def __init__(self, cmdline):
+            self.info = {"cmdline": cmdline}
+
+    fake_psutil = types.SimpleNamespace(
+        process_iter=lambda attrs: iter([
+            FakeProcess(None),
+            FakeProcess(["/usr/bin/python", "http://127.0.0.1:1000/nope=/"]),
+            FakeProcess(["/sdk/bin/dart", "run", "--vm=http://127.0.0.1:50123/abc=/"]),
+        ])
+    )
+
+    async def fail_stream(cmd, on_line, timeout):
+        raise AssertionError("ps should not be spawned when psutil is available")
+
+    monkeypatch.setattr(server_module, "psutil", fake_psutil)
+    monkeypatch.setattr(server_module, "_stream_command_lines", fail_stream)
+
+    entries = await server_module._scan_process_list()
+
+    assert entries == [
+        ("ws://127.0.0.1:50123/abc=/ws", "http://127.0.0.1:50123/abc=/", "/sdk/bin/dart", "")
+    ]
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+async def test_vm_probe_speaks_plain_http(chunked) -> None:
+    body = b'{"jsonrpc":"2.0","result":{"type":"VM","name":"vm"}}'
+
+    async def handle(reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        assert request.startswith(b"GET /getVM HTTP/1.1\r\n")
+        if chunked:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                + b"%x\r\n" % 10 + body[:10] + b"\r\n"
+                + b"%x\r\n" % (len(body) - 10) + body[10:] + b"\r\n0\r\n\r\n"
+            )
+        else:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        entry = await server_module._probe_vm_port(port, "dart", timeout=1.0)
+
+    assert entry == (
+        f"ws://127.0.0.1:{port}/ws",
+        f"http://127.0.0.1:{port}",
+        "dart",
+        "vm (auth token may be required)",
+    )
+
+
+async def test_vm_probe_ignores_closed_ports() -> None:
+    server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+    assert await server_module._probe_vm_port(port, "dart", timeout=1.0) is None
+
+
+async def test_console_scan_streams_and_stops_at_first_match(monkeypatch) -> None:
+    import sys
+    import time
+
+    script = (
+        "import sys, time\n"
+        "print('noise', flush=True)\n"
+        "print('DTD at ws://127.0.0.1:50200/xyz=/ws', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    monkeypatch.setattr(server_module, "_LOG_SHOW_CMD", (sys.executable, "-c", script))
+
+    start = time.monotonic()
+    entries = await server_module._scan_console_logs(stop_at_first=True, timeout=10)
+
+    assert time.monotonic() - start < 5
+    assert [entry[0] for entry in entries] == ["ws://127.0.0.1:50200/xyz=/ws"]
+
+    entries = await server_module._scan_console_logs(timeout=0.5)
+    assert [entry[0] for entry in entries] == ["ws://127.0.0.1:50200/xyz=/ws"]
+
+
+async def test_discovery_results_are_cached_briefly(monkeypatch) -> None:
+    scans = 0
+
+    async def fake_ps():
+        nonlocal scans
+        scans += 1
+        return [("ws://127.0.0.1:50123/abc=/ws", "http://127.0.0.1:50123/abc=/", "dart", "")]
+
+    async def nothing():
+        return []
+
+    monkeypatch.setattr(server_module, "_scan_process_list", fake_ps)
+    monkeypatch.setattr(server_module, "_scan_flutter_state_files", nothing)
+    monkeypatch.setattr(server_module, "_list_dart_listening_ports", nothing)
+
+    first = await server_module.discover_dtd_uris.fn()
+    assert await server_module.discover_dtd_uris.fn() is first
+    assert scans == 1
+
+    monkeypatch.setattr(server_module, "DTD_DISCOVERY_CACHE_TTL", 0.0)
+    await server_module.discover_dtd_uris.fn()
+    assert scans == 2
+
+
+def test_unchanged_state_files_are_not_reread(tmp_path, monkeypatch) -> None:
+    import builtins
+    import os
+
+    state_dir = tmp_path / ".flutter_tool_state"
+    state_dir.mkdir()
+    state_file = state_dir / "session"
+    state_file.write_text("vm: http://127.0.0.1:50123/abc=/\n")
+    monkeypatch.setattr(server_module.Path, "home", lambda: tmp_path)
+    monkeypatch.setattr(server_module, "_state_file_cache", {})
+
+    opened: list[str] = []
+    original_open = builtins.open
+
+    def recording_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return original_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", recording_open)
+
+    first = server_module._read_flutter_state_files()
+    second = server_module._read_flutter_state_files()
+    assert first == second
+    assert opened == [str(state_file)]
+
+    state_file.write_text("vm: http://127.0.0.1:50999/xyz=/\n")
+    os.utime(state_file, ns=(0, 10**18))
+    third = server_module._read_flutter_state_files()
+    assert third[0][0] == "ws://127.0.0.1:50999/xyz=/ws"
+    assert len(opened) == 2
+
+
+async def test_missing_discovery_commands_are_not_spawned(monkeypatch) -> None:
+    async def fail_spawn(*args, **kwargs):
+        raise AssertionError("missing commands should not be spawned")
+
+    monkeypatch.setattr(server_module, "_command_available", lambda name: False)
+    monkeypatch.setattr(server_module.asyncio, "create_subprocess_exec", fail_spawn)
+
+    lines: list[str] = []
+    await server_module._stream_command_lines(("lsof",), lines.append, timeout=1.0)
+
+    assert lines == []
+
+
+async def test_discovery_output_is_capped(fake_commands, monkeypatch) -> None:
+    outputs, _ = fake_commands
+    monkeypatch.setattr(server_module, "MAX_DISCOVERED", 3)
+    monkeypatch.setattr(server_module, "MAX_PROBED_PORTS", 2)
+    outputs["ps"] = "".join(
+        f"u {i} 0 0 0 0 ?? S 0:00 0:01 dart --vm http://127.0.0.1:{50000 + i}/t=/\n"
+        for i in range(10)
+    )
+    outputs["lsof"] = "".join(
+        f"dart 1 u 5u IPv4 0 0t0 TCP 127.0.0.1:{9000 + i}\n" for i in range(5)
+    )
+
+    assert len(await server_module._scan_process_list()) == 3
+    assert await server_module._list_dart_listening_ports() == [(9000, "dart"), (9001, "dart")]
+    result = await server_module.discover_dtd_uris.fn()
+    assert result.count("- ws://") == 3
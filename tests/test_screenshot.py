@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from mobile_pilot_mcp import server as server_module
+
+
+@pytest.fixture
+def screenshot_dir(tmp_path, monkeypatch) -> Path:
+    monkeypatch.setattr(server_module, "SCREENSHOT_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_simctl_screenshot(monkeypatch):
+    """Make simulator_manager.screenshot_bytes return a synthetic RGBA PNG."""
+
+    async def fake_screenshot_bytes(udid: str) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGBA", (100, 200), (10, 20, 30, 255)).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    monkeypatch.setattr(
+        server_module.simulator_manager, "screenshot_bytes", fake_screenshot_bytes
+    )
+
+
+async def test_get_screenshot_resizes_and_encodes_jpeg(
+    screenshot_dir, fake_simctl_screenshot
+) -> None:
+    result = await server_module.get_screenshot.fn("UDID", scale=0.5, format="jpeg", quality=80)
+
+    saved = Path(result.splitlines()[0].split(": ", 1)[1])
+    assert saved.suffix == ".jpg"
+    assert "Original: 100x200" in result
+    assert "Optimized: 50x100" in result
+    with Image.open(saved) as img:
+        assert img.size == (50, 100)
+        assert img.mode == "RGB"
+    assert not list(screenshot_dir.glob("temp-*"))
+
+
+def test_process_screenshot_applies_rotation(screenshot_dir) -> None:
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 200)).save(buffer, "PNG")
+
+    _, original_size, _, new_size, _ = server_module._process_screenshot(
+        buffer.getvalue(), "test", Image.Transpose.ROTATE_90, 1.0, "png", 85
+    )
+
+    assert original_size == (200, 100)
+    assert new_size == (200, 100)
+
+
+async def test_full_size_png_skips_reencode(screenshot_dir, fake_simctl_screenshot) -> None:
+    result = await server_module.get_screenshot.fn("UDID", scale=1.0, format="png")
+
+    saved = Path(result.splitlines()[0].split(": ", 1)[1])
+    assert saved.suffix == ".png"
+    assert "Optimized: 100x200" in result
+    assert "Reduction: 0.0%" in result
+    assert not list(screenshot_dir.glob("temp-*"))
+
+
+def test_file_stamp_is_unique_and_increasing() -> None:
+    stamps = [server_module.file_stamp() for _ in range(50)]
+
+    assert len(set(stamps)) == len(stamps)
+    assert stamps == sorted(stamps)
+
+
+def test_output_dirs_are_created_once(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "_ensured_dirs", set())
+    target = tmp_path / "shots"
+    mkdir_calls = 0
+    original_mkdir = Path.mkdir
+
+    def counting_mkdir(self, *args, **kwargs):
+        nonlocal mkdir_calls
+        mkdir_calls += 1
+        return original_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+
+    server_module._ensure_dir(target)
+    server_module._ensure_dir(target)
+
+    assert target.is_dir()
+    assert mkdir_calls == 1
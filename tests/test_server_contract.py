@@ -40,3 +40,13 @@ def test_fastmcp_resources_registered() -> None:
 
     assert "mobile-pilot://api-reference" in resource_keys
     assert "mobile-pilot://automation-guide" in resource_keys
+
+
+def test_doc_resources_are_static_markdown() -> None:
+    from fastmcp.resources import TextResource
+
+    resource = asyncio.run(server_module.mcp.get_resource("mobile-pilot://api-reference"))
+
+    assert isinstance(resource, TextResource)
+    assert resource.mime_type == "text/markdown"
+    assert asyncio.run(resource.read()) is server_module.API_REFERENCE
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import plistlib
+import signal
+import subprocess
+
+import pytest
+
+from mobile_pilot_mcp import simulator
+from mobile_pilot_mcp.simulator import SimulatorDevice, SimulatorState
+
+
+def test_ios_version_is_parsed_once_per_device() -> None:
+    device = SimulatorDevice(
+        udid="UDID",
+        name="iPhone 15",
+        state=SimulatorState.BOOTED,
+        runtime="com.apple.CoreSimulator.SimRuntime.iOS-17-4",
+    )
+
+    assert device.ios_version == "17.4"
+    assert vars(device)["ios_version"] == "17.4"
+    assert SimulatorDevice("U", "W", SimulatorState.SHUTDOWN, "watchOS-10-0").ios_version == (
+        "Unknown"
+    )
+
+
+async def test_list_apps_is_cached_until_apps_dir_changes(tmp_path, monkeypatch) -> None:
+    manager = simulator.SimulatorManager()
+    device = SimulatorDevice("UDID", "iPhone", SimulatorState.BOOTED, "iOS-17-4")
+    device.data_path = str(tmp_path)
+    apps_dir = tmp_path / "Containers" / "Bundle" / "Application"
+
+    def install(container: str, info: dict, fmt=plistlib.FMT_XML) -> None:
+        app = apps_dir / container / "Demo.app"
+        app.mkdir(parents=True)
+        (app / "Info.plist").write_bytes(plistlib.dumps(info, fmt=fmt))
+
+    reads = 0
+    original_read = simulator._read_plist
+
+    def counting_read(path):
+        nonlocal reads
+        reads += 1
+        return original_read(path)
+
+    async def get_device(udid):
+        return device
+
+    monkeypatch.setattr(manager, "get_device", get_device)
+    monkeypatch.setattr(simulator, "_read_plist", counting_read)
+
+    install("A", {"CFBundleIdentifier": "com.example.a", "CFBundleShortVersionString": "1.2"})
+    first = await manager.list_apps("UDID")
+    assert await manager.list_apps("UDID") == first
+    assert reads == 1
+    (demo,) = [app for app in first if app.bundle_id == "com.example.a"]
+    assert (demo.name, demo.version) == ("Demo", "1.2")
+
+    install("B", {"CFBundleIdentifier": "com.example.b"}, fmt=plistlib.FMT_BINARY)
+    assert "com.example.b" in {app.bundle_id for app in await manager.list_apps("UDID")}
+    assert reads == 3
+
+
+async def test_get_device_uses_udid_index(monkeypatch) -> None:
+    listing = {
+        "devices": {
+            "com.apple.CoreSimulator.SimRuntime.iOS-17-4": [
+                {"udid": "A", "name": "iPhone 15", "state": "Booted"},
+                {"udid": "B", "name": "iPad", "state": "Shutdown"},
+            ]
+        }
+    }
+
+    async def fake_run(*args, **kwargs):
+        return subprocess.CompletedProcess(args, 0, json.dumps(listing).encode(), b"")
+
+    manager = simulator.SimulatorManager()
+    monkeypatch.setattr(manager, "_run_simctl_raw", fake_run)
+
+    assert (await manager.get_device("B")).name == "iPad"
+    assert await manager.get_device("missing") is None
+
+    del listing["devices"]["com.apple.CoreSimulator.SimRuntime.iOS-17-4"][1]
+    await manager.list_devices(refresh=True)
+    assert await manager.get_device("B") is None
+
+
+async def test_concurrent_list_devices_share_one_simctl_call(monkeypatch) -> None:
+    runs = 0
+
+    async def fake_run(*args, **kwargs):
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        listing = b'{"devices": {"iOS-17-4": [{"udid": "A", "name": "iPhone"}]}}'
+        return subprocess.CompletedProcess(args, 0, listing, b"")
+
+    manager = simulator.SimulatorManager()
+    monkeypatch.setattr(manager, "_run_simctl_raw", fake_run)
+
+    results = await asyncio.gather(*(manager.list_devices(refresh=True) for _ in range(5)))
+
+    assert runs == 1
+    assert all([d.udid for d in devices] == ["A"] for devices in results)
+    await manager.list_devices(refresh=True)
+    assert runs == 2
+
+
+async def test_refresh_does_not_join_a_listing_already_running(monkeypatch) -> None:
+    listings = iter([
+        b'{"devices": {}}',
+        b'{"devices": {"iOS-17-4": [{"udid": "A", "name": "iPhone"}]}}',
+    ])
+    gate = asyncio.Event()
+
+    async def fake_run(*args, **kwargs):
+        listing = next(listings)
+        await gate.wait()
+        return subprocess.CompletedProcess(args, 0, listing, b"")
+
+    manager = simulator.SimulatorManager()
+    monkeypatch.setattr(manager, "_run_simctl_raw", fake_run)
+
+    stale = asyncio.create_task(manager.list_devices())
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    fresh = asyncio.create_task(manager.list_devices(refresh=True))
+    await asyncio.sleep(0)
+    gate.set()
+
+    assert await stale == []
+    assert [d.udid for d in await fresh] == ["A"]
+    assert [d.udid for d in await manager.list_devices()] == ["A"]
+
+
+async def test_push_notification_pipes_payload_over_stdin(monkeypatch) -> None:
+    seen: dict = {}
+
+    class FakeProcess:
+        returncode = 0
+
+        async def communicate(self, input=None):
+            seen["input"] = input
+            return b"", b""
+
+    async def fake_exec(*cmd, **kwargs):
+        seen["cmd"] = cmd
+        seen["stdin"] = kwargs.get("stdin")
+        return FakeProcess()
+
+    monkeypatch.setattr(simulator.asyncio, "create_subprocess_exec", fake_exec)
+
+    payload = {"aps": {"alert": "Hi"}}
+    await simulator.SimulatorManager().push_notification("UDID", "com.example.app", payload)
+
+    assert seen["cmd"][-4:] == ("push", "UDID", "com.example.app", "-")
+    assert seen["stdin"] == simulator.asyncio.subprocess.PIPE
+    assert json.loads(seen["input"]) == payload
+
+
+async def test_simctl_path_is_resolved_once(tmp_path, monkeypatch) -> None:
+    simctl = tmp_path / "simctl"
+    simctl.write_text("")
+    commands: list[tuple] = []
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self, stdout: bytes) -> None:
+            self.stdout = stdout
+
+        async def communicate(self, input=None):
+            return self.stdout, b""
+
+    async def fake_exec(*cmd, **kwargs):
+        commands.append(cmd)
+        return FakeProcess(f"{simctl}\n".encode() if cmd[:2] == ("xcrun", "-f") else b"")
+
+    monkeypatch.setattr(simulator.asyncio, "create_subprocess_exec", fake_exec)
+    manager = simulator.SimulatorManager()
+
+    await manager.open_url("UDID", "https://example.com")
+    await manager.set_location("UDID", 1.0, 2.0)
+
+    assert commands[0] == ("xcrun", "-f", "simctl")
+    assert [cmd[:2] for cmd in commands[1:]] == [
+        (str(simctl), "openurl"),
+        (str(simctl), "location"),
+    ]
+
+
+async def test_stop_recording_escalates_signals(monkeypatch) -> None:
+    class StubbornProcess:
+        returncode = None
+
+        def __init__(self, exits_on: signal.Signals | None) -> None:
+            self.exits_on = exits_on
+            self.signals: list[signal.Signals] = []
+            self.killed = False
+
+        def send_signal(self, sig) -> None:
+            self.signals.append(sig)
+
+        def kill(self) -> None:
+            self.killed = True
+
+        async def wait(self) -> int:
+            if self.killed or (self.signals and self.signals[-1] == self.exits_on):
+                return 0
+            await asyncio.sleep(1)
+            return 0
+
+    monkeypatch.setattr(simulator, "RECORDING_SIGINT_TIMEOUT", 0.01)
+    monkeypatch.setattr(simulator, "RECORDING_SIGTERM_TIMEOUT", 0.01)
+    manager = simulator.SimulatorManager()
+    monkeypatch.setattr(manager, "_recording_processes", {})
+
+    for exits_on, expected, killed in (
+        (signal.SIGINT, [signal.SIGINT], False),
+        (signal.SIGTERM, [signal.SIGINT, signal.SIGTERM], False),
+        (None, [signal.SIGINT, signal.SIGTERM], True),
+    ):
+        proc = StubbornProcess(exits_on)
+        manager._recording_processes["UDID"] = proc
+        assert await manager.stop_recording("UDID")
+        assert (proc.signals, proc.killed) == (expected, killed)
+
+
+async def test_boot_skips_device_listing_and_tolerates_already_booted(monkeypatch) -> None:
+    calls: list[tuple] = []
+
+    async def fake_run(*args, **kwargs):
+        calls.append(args)
+        raise simulator.SimulatorError(
+            "simctl command failed: Unable to boot device in current state: Booted"
+        )
+
+    manager = simulator.SimulatorManager()
+    monkeypatch.setattr(manager, "_run_simctl", fake_run)
+
+    await manager.boot("UDID")
+    assert calls == [("boot", "UDID")]
+
+    async def failing_run(*args, **kwargs):
+        raise simulator.SimulatorError("simctl command failed: Invalid device: UDID")
+
+    monkeypatch.setattr(manager, "_run_simctl", failing_run)
+    with pytest.raises(simulator.SimulatorError, match="Invalid device"):
+        await manager.boot("UDID")
+
+
+async def test_list_apps_merges_system_apps_in_name_order(tmp_path, monkeypatch) -> None:
+    manager = simulator.SimulatorManager()
+    device = SimulatorDevice("UDID", "iPhone", SimulatorState.BOOTED, "iOS-17-4")
+    device.data_path = str(tmp_path)
+    for container, name, bundle_id in (
+        ("A", "maps", "com.apple.Maps"),
+        ("B", "Zebra", "com.example.zebra"),
+        ("C", "Archive", "com.example.archive"),
+    ):
+        app = tmp_path / "Containers" / "Bundle" / "Application" / container / f"{name}.app"
+        app.mkdir(parents=True)
+        info = {"CFBundleIdentifier": bundle_id, "CFBundleName": name}
+        (app / "Info.plist").write_bytes(plistlib.dumps(info))
+
+    async def get_device(udid):
+        return device
+
+    monkeypatch.setattr(manager, "get_device", get_device)
+
+    apps = await manager.list_apps("UDID")
+    names = [app.name for app in apps]
+
+    assert names == sorted(names, key=str.lower)
+    assert names[0] == "App Store" and names[1] == "Archive" and names[-1] == "Zebra"
+    assert [app.bundle_id for app in apps].count("com.apple.Maps") == 1
+    assert len(apps) == len(simulator._SYSTEM_APPS) + 2
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from mobile_pilot_mcp import server as server_module
+
+SOURCE = {
+    "type": "Application",
+    "label": "Demo",
+    "rect": {"x": 0, "y": 0, "width": 390, "height": 844},
+    "children": [
+        {
+            "type": "Button",
+            "label": "Login",
+            "rect": {"x": 100, "y": 200, "width": 80, "height": 40},
+        },
+        {
+            "type": "TextField",
+            "identifier": "username",
+            "rect": {"x": 20, "y": 300, "width": 200, "height": 40},
+        },
+    ],
+}
+
+
+class FakeWDAClient:
+    def __init__(self, source: dict | None = None) -> None:
+        self.source = source if source is not None else SOURCE
+        self.session_id = "session"
+        self.source_requests = 0
+        self.taps: list[tuple[int, int]] = []
+        self.typed: list[str] = []
+
+    async def get_source(self, format: str = "json"):
+        self.source_requests += 1
+        return self.source
+
+    async def tap(self, x: int, y: int) -> None:
+        self.taps.append((x, y))
+
+    async def send_keys(self, text: str) -> None:
+        self.typed.append(text)
+
+    async def wait_for_keyboard(self, timeout: float = 1.0) -> bool:
+        return True
+
+
+@pytest.fixture
+def fake_client(monkeypatch) -> FakeWDAClient:
+    client = FakeWDAClient()
+    monkeypatch.setattr(server_module, "get_wda_client", lambda *args, **kwargs: client)
+    monkeypatch.setattr(server_module, "_last_ui_elements", {})
+    monkeypatch.setattr(server_module, "_parsed_ui_cache", {})
+    monkeypatch.setattr(server_module, "_ui_snapshots", {})
+    return client
+
+
+async def test_tap_by_predicate_reuses_parse_for_unchanged_source(
+    fake_client, monkeypatch
+) -> None:
+    parse_calls = 0
+    original_parse = server_module.UITreeParser.parse
+
+    def counting_parse(self, *args, **kwargs):
+        nonlocal parse_calls
+        parse_calls += 1
+        return original_parse(self, *args, **kwargs)
+
+    monkeypatch.setattr(server_module.UITreeParser, "parse", counting_parse)
+
+    predicate = {"text": "Login"}
+    first = await server_module.tap.fn("UDID", predicate=predicate)
+    second = await server_module.tap.fn("UDID", predicate=predicate)
+
+    assert first == second == "Tapped element [1] Button at (140, 220)"
+    assert fake_client.taps == [(140, 220), (140, 220)]
+    assert fake_client.source_requests == 2
+    assert parse_calls == 1
+
+    fake_client.source = {**SOURCE, "children": SOURCE["children"][:1]}
+    await server_module.tap.fn("UDID", predicate=predicate)
+    assert parse_calls == 2
+
+
+def test_get_wda_client_keys_by_device_host_and_port(monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "wda_clients", {})
+    monkeypatch.setattr(server_module, "_primary_clients", {})
+
+    default = server_module.get_wda_client("UDID")
+    remote = server_module.get_wda_client("UDID", 8101, "10.0.0.2")
+
+    assert server_module.get_wda_client("UDID") is default
+    assert remote is not default
+    assert set(server_module.wda_clients) == {
+        ("UDID", server_module.WDA_HOST, server_module.DEFAULT_WDA_PORT),
+        ("UDID", "10.0.0.2", 8101),
+    }
+    assert server_module._primary_clients["UDID"] is remote
+
+
+async def test_dashboard_middleware_tracks_tool_calls(monkeypatch) -> None:
+    import mcp.types as mt
+    from fastmcp.server.middleware import MiddlewareContext
+    from fastmcp.tools.tool import ToolResult
+
+    from mobile_pilot_mcp.dashboard import DashboardState
+
+    state = DashboardState()
+    monkeypatch.setattr(server_module, "dashboard_state", state)
+    middleware = server_module.DashboardTrackingMiddleware()
+    context = MiddlewareContext(
+        message=mt.CallToolRequestParams(name="go_home", arguments={"device_id": "UDID"}),
+        method="tools/call",
+    )
+
+    async def call_next(ctx):
+        return ToolResult(content="Navigated to home screen")
+
+    result = await middleware.on_call_tool(context, call_next)
+
+    assert result.content[0].text == "Navigated to home screen"
+    (call,) = state.tool_calls
+    assert call.tool_name == "go_home"
+    assert call.arguments == {"device_id": "UDID"}
+    assert call.status == "success"
+    assert call.result == "Navigated to home screen"
+
+    async def failing_call_next(ctx):
+        raise RuntimeError("WDA down")
+
+    with pytest.raises(RuntimeError):
+        await middleware.on_call_tool(context, failing_call_next)
+    assert state.tool_calls[-1].status == "error"
+    assert state.tool_calls[-1].error == "WDA down"
+
+
+async def test_dashboard_executor_resolves_tools_once(monkeypatch, fake_client) -> None:
+    from mobile_pilot_mcp.dashboard import DashboardState
+
+    async def no_dashboard(*args, **kwargs):
+        return None
+
+    state = DashboardState()
+    monkeypatch.setattr(server_module, "dashboard_state", state)
+    monkeypatch.setattr(server_module, "start_dashboard", no_dashboard)
+    monkeypatch.setattr(server_module, "_tool_fn_by_name", {})
+
+    async def get_window_size():
+        return {"width": 390, "height": 844}
+
+    fake_client.get_window_size = get_window_size
+
+    async with server_module.lifespan(server_module.mcp):
+        async def fail_lookup(name):
+            raise AssertionError("get_tool should not be called per action")
+
+        monkeypatch.setattr(server_module.mcp, "get_tool", fail_lookup)
+        result = await state.tool_executor("get_window_size", {"device_id": "UDID"})
+        with pytest.raises(ValueError, match="Unknown tool"):
+            await state.tool_executor("no_such_tool", {})
+
+    assert result == "Window size: 390x844"
+    assert state.tool_calls[-1].tool_name == "get_window_size"
+    assert state.tool_calls[-1].status == "success"
+
+
+async def test_in_process_calls_validate_arguments(monkeypatch, fake_client) -> None:
+    from mobile_pilot_mcp.dashboard import DashboardState
+
+    async def no_dashboard(*args, **kwargs):
+        return None
+
+    state = DashboardState()
+    monkeypatch.setattr(server_module, "dashboard_state", state)
+    monkeypatch.setattr(server_module, "start_dashboard", no_dashboard)
+    monkeypatch.setattr(server_module, "_tool_fn_by_name", {})
+
+    async with server_module.lifespan(server_module.mcp):
+        await state.tool_executor("tap", {"device_id": "UDID", "x": "10", "y": "20"})
+        with pytest.raises(ValidationError):
+            await state.tool_executor("tap", {"device_id": "UDID", "x": "left", "y": 20})
+        batch = await server_module.batch_call.fn(
+            [{"tool": "swipe", "args": {"device_id": "UDID", "direction": "sideways"}}]
+        )
+
+    assert fake_client.taps == [(10, 20)]
+    assert batch["results"][0]["ok"] is False
+    assert state.tool_calls[1].status == "error"
+
+
+async def test_status_bar_batch_merges_into_one_simctl_call(monkeypatch) -> None:
+    calls: list[dict] = []
+
+    async def fake_override(udid: str, **kwargs) -> None:
+        calls.append(kwargs)
+
+    monkeypatch.setattr(server_module.simulator_manager, "status_bar_override", fake_override)
+
+    result = await server_module.set_status_bar_batch.fn(
+        "UDID", [{"time": "9:41", "battery_level": 50}, {"battery_level": 100, "wifi_bars": 3}]
+    )
+
+    assert result == "Status bar updated: time=9:41, battery=100%, wifi_bars=3"
+    (kwargs,) = calls
+    assert kwargs["battery_level"] == 100
+    assert kwargs["cellular_bars"] is None
+
+    with pytest.raises(ValueError, match="Unknown status bar override"):
+        await server_module.set_status_bar_batch.fn("UDID", [{"volume": 3}])
+    with pytest.raises(ValueError):
+        await server_module.set_status_bar_batch.fn("UDID", [{"wifi_bars": 9}])
+
+
+async def test_batch_call_runs_in_order_and_stops_on_error(monkeypatch, fake_client) -> None:
+    from mobile_pilot_mcp.dashboard import DashboardState
+
+    state = DashboardState()
+    monkeypatch.setattr(server_module, "dashboard_state", state)
+    monkeypatch.setattr(
+        server_module,
+        "_tool_fn_by_name",
+        {"tap": server_module.tap.fn, "type_text": server_module.type_text.fn},
+    )
+
+    calls = [
+        {"tool": "tap", "args": {"device_id": "UDID", "x": 10, "y": 20}},
+        {"tool": "nope", "args": {}},
+        {"tool": "type_text", "args": {"device_id": "UDID", "text": "hi"}},
+    ]
+    stopped = await server_module.batch_call.fn(calls)
+
+    assert [r["ok"] for r in stopped["results"]] == [True, False]
+    assert stopped["results"][1]["error"] == "Unknown tool: nope"
+    assert fake_client.typed == []
+
+    continued = await server_module.batch_call.fn(calls, continue_on_error=True)
+
+    assert [r["ok"] for r in continued["results"]] == [True, False, True]
+    assert fake_client.taps == [(10, 20), (10, 20)]
+    assert fake_client.typed == ["hi"]
+    assert [c.tool_name for c in state.tool_calls] == ["tap", "tap", "type_text"]
+
+
+async def test_directional_swipe_uses_current_window_size(fake_client) -> None:
+    sizes = iter([{"width": 390, "height": 844}, {"width": 844, "height": 390}])
+    swipes: list[tuple] = []
+
+    async def get_window_size():
+        return next(sizes)
+
+    async def swipe(*args):
+        swipes.append(args)
+
+    fake_client.get_window_size = get_window_size
+    fake_client.swipe = swipe
+
+    await server_module.swipe.fn("UDID", direction="up")
+    # After a rotation the swipe follows the landscape size
+    await server_module.swipe.fn("UDID", direction="up")
+    assert swipes[0][:4] == (195, 552, 195, 292)
+    assert swipes[1][:4] == (422, 325, 422, 65)
+
+
+async def test_stop_recording_reports_size_or_pending_file(tmp_path, monkeypatch) -> None:
+    video = tmp_path / "recording.mov"
+    video.write_bytes(b"x" * 2048)
+
+    async def stop(device_id):
+        return True
+
+    monkeypatch.setattr(server_module.simulator_manager, "is_recording", lambda device_id: True)
+    monkeypatch.setattr(server_module.simulator_manager, "stop_recording", stop)
+    monkeypatch.setattr(server_module, "_recording_paths", {"UDID": video})
+
+    result = await server_module.stop_recording.fn("UDID")
+    assert result == f"Screen recording saved: {video}\nSize: 2.0KB"
+
+    server_module._recording_paths["UDID"] = tmp_path / "missing.mov"
+    result = await server_module.stop_recording.fn("UDID")
+    assert result == "Recording stopped but file may still be processing"
+
+
+async def test_set_status_bar_summary(monkeypatch) -> None:
+    async def fake_override(udid: str, **kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(server_module.simulator_manager, "status_bar_override", fake_override)
+
+    result = await server_module.set_status_bar.fn(
+        "UDID", battery_state="charged", data_network="5g", operator_name=""
+    )
+    assert result == "Status bar updated: battery_state=charged, network=5g, operator=(hidden)"
+
+    with pytest.raises(ValueError, match="At least one"):
+        await server_module.set_status_bar.fn("UDID")
+
+
+async def test_wda_clients_are_lru_bounded_and_reset_per_device(monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "wda_clients", {})
+    monkeypatch.setattr(server_module, "_primary_clients", {})
+    monkeypatch.setattr(server_module, "MAX_WDA_CLIENTS", 2)
+
+    first = server_module.get_wda_client("A")
+    second = server_module.get_wda_client("A", 8101)
+    assert server_module.get_wda_client("A") is first
+    server_module.get_wda_client("B")
+
+    assert list(server_module.wda_clients.values())[0] is first
+    assert second not in server_module.wda_clients.values()
+    assert server_module._primary_clients == {
+        "A": first,
+        "B": server_module.get_wda_client("B"),
+    }
+
+    reset: list = []
+    for client in server_module.wda_clients.values():
+        async def delete_session(client=client) -> None:
+            reset.append(client)
+
+        client.delete_session = delete_session
+
+    await server_module.reset_wda_session("A")
+    assert reset == [first]
+
+    server_module.get_wda_client("C")
+    assert "A" not in server_module._primary_clients
+
+
+async def test_reset_session_resets_every_connection_to_the_device(monkeypatch) -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.method} {request.url.port} {request.url.path}")
+        if request.method == "POST":
+            return httpx.Response(200, json={"sessionId": "new", "value": {"sessionId": "new"}})
+        return httpx.Response(200, json={"value": None})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(server_module, "_http_client", http_client)
+    monkeypatch.setattr(server_module, "wda_clients", {})
+    monkeypatch.setattr(server_module, "_primary_clients", {})
+
+    other = server_module.get_wda_client("UDID", 8101)
+    primary = server_module.get_wda_client("UDID", 8100)
+    for client, session_id in ((other, "old-8101"), (primary, "old-8100")):
+        client.session_id = session_id
+        client._actions_strategy = "legacy"
+        client._info_cache["window_size"] = (0.0, {"width": 390, "height": 844})
+
+    result = await server_module.reset_session.fn("UDID")
+
+    assert result == "Session reset. New session created (ID: new)."
+    assert seen == [
+        "DELETE 8101 /session/old-8101",
+        "DELETE 8100 /session/old-8100",
+        "POST 8100 /session",
+    ]
+    assert other.session_id is None and primary.session_id == "new"
+    assert other._actions_strategy == primary._actions_strategy == "unknown"
+    assert other._info_cache == primary._info_cache == {}
+    await http_client.aclose()
+
+
+async def test_predicate_lookups_share_a_fresh_ui_snapshot(fake_client, monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "UI_SNAPSHOT_TTL", 60.0)
+
+    await server_module.get_ui_tree.fn("UDID")
+    await server_module.type_text.fn("UDID", "alice", predicate={"identifier": "username"})
+    assert fake_client.source_requests == 1
+    assert fake_client.taps == [(120, 320)]
+
+    # Typing may have changed the screen, so the next lookup refetches
+    await server_module.tap.fn("UDID", predicate={"text": "Login"})
+    assert fake_client.source_requests == 2
+
+    monkeypatch.setattr(server_module, "UI_SNAPSHOT_TTL", 0.0)
+    await server_module.tap.fn("UDID", predicate={"text": "Login"})
+    assert fake_client.source_requests == 3
+
+
+async def test_simulator_state_changes_drop_the_ui_snapshot(fake_client, monkeypatch) -> None:
+    async def noop(*args, **kwargs) -> None:
+        return None
+
+    monkeypatch.setattr(server_module, "UI_SNAPSHOT_TTL", 60.0)
+    monkeypatch.setattr(server_module.simulator_manager, "set_location", noop)
+    monkeypatch.setattr(server_module.simulator_manager, "status_bar_override", noop)
+
+    await server_module.get_ui_index("UDID", fake_client)
+    await server_module.set_location.fn("UDID", 48.85, 2.35)
+    assert "UDID" not in server_module._ui_snapshots
+
+    await server_module.get_ui_index("UDID", fake_client)
+    assert "UDID" in server_module._ui_snapshots
+    await server_module.set_status_bar.fn("UDID", time="9:41")
+    assert "UDID" not in server_module._ui_snapshots
+
+    async def simulate_biometrics(match: bool = True) -> None:
+        return None
+
+    fake_client.simulate_biometrics = simulate_biometrics
+    await server_module.get_ui_index("UDID", fake_client)
+    await server_module.simulate_biometrics.fn("UDID")
+    assert "UDID" not in server_module._ui_snapshots
+
+
+async def test_json_ui_tree_matches_stdlib_fallback(fake_client, monkeypatch) -> None:
+    fast = await server_module.get_ui_tree.fn("UDID", format="json")
+    monkeypatch.setattr(server_module, "orjson", None)
+    monkeypatch.setattr(server_module, "_parsed_ui_cache", {})
+    fallback = await server_module.get_ui_tree.fn("UDID", format="json")
+
+    assert json.loads(fast) == json.loads(fallback)
+    assert json.loads(fast)[1]["label"] == "Login"
+
+
+async def test_ui_caches_keep_only_recent_devices(fake_client, monkeypatch) -> None:
+    monkeypatch.setattr(server_module, "MAX_UI_CACHE_DEVICES", 2)
+
+    for device_id in ("A", "B", "A", "C"):
+        await server_module.get_ui_tree.fn(device_id)
+
+    assert list(server_module._last_ui_elements) == ["A", "C"]
+    assert list(server_module._parsed_ui_cache) == ["A", "C"]
+
+
+async def test_flat_lookups_skip_tree_but_tree_view_links_children(fake_client) -> None:
+    await server_module.tap.fn("UDID", predicate={"text": "Login"})
+    _, _, has_tree, root, _ = server_module._parsed_ui_cache["UDID"]
+    assert not has_tree and root.children == []
+
+    tree = await server_module.get_ui_tree.fn("UDID")
+    assert tree.splitlines() == [
+        '[0] Application "Demo"',
+        '  [1] Button "Login"',
+        '  [2] TextField "username"',
+    ]
+    assert server_module._parsed_ui_cache["UDID"][2]
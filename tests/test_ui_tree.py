@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from mobile_pilot_mcp.ui_tree import UITreeParser
+
+
+def make_node(elem_type: str, label: str | None = None, **extra) -> dict:
+    node = {"type": elem_type, "label": label, "rect": {"x": 0, "y": 0, "width": 10, "height": 10}}
+    node.update(extra)
+    return node
+
+
+def test_parse_preserves_document_order_and_drops_hidden_subtrees() -> None:
+    tree = make_node(
+        "Application",
+        children=[
+            make_node("Button", "A", children=[make_node("StaticText", "A1")]),
+            make_node("Other", "hidden", isVisible=False, children=[make_node("Button", "H")]),
+            make_node("Button", "B"),
+        ],
+    )
+
+    root, flat = UITreeParser().parse(tree)
+
+    assert [e.label for e in flat] == [None, "A", "A1", "B"]
+    assert [e.index for e in flat] == [0, 1, 2, 3]
+    assert [c.label for c in root.children] == ["A", "B"]
+    assert root.children[0].children[0].label == "A1"
+
+
+def test_parse_handles_hierarchies_deeper_than_recursion_limit() -> None:
+    depth = 3000
+    tree = make_node("Other", "0")
+    node = tree
+    for i in range(1, depth):
+        child = make_node("Other", str(i))
+        node["children"] = [child]
+        node = child
+    xml = "".join(f'<Other label="{i}">' for i in range(depth)) + "</Other>" * depth
+
+    parser = UITreeParser()
+    root, flat = parser.parse(tree)
+    _, xml_flat = parser.parse(xml)
+
+    assert len(flat) == len(xml_flat) == depth
+    assert flat[-1].label == xml_flat[-1].label == str(depth - 1)
+
+    lines = parser.format_tree(root, flat).splitlines()
+    assert lines[1] == '  [1] Other "1"'
+    assert lines[-1] == "  " * (depth - 1) + f'[{depth - 1}] Other "{depth - 1}"'
+
+    node = root.to_dict()
+    for _ in range(depth - 1):
+        node = node["children"][0]
+    assert node["label"] == str(depth - 1)
+    assert "children" not in node
+
+
+def test_xml_parse_matches_stdlib_fallback(monkeypatch) -> None:
+    import pytest
+
+    from mobile_pilot_mcp import ui_tree
+
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<XCUIElementTypeApplication type="Application" label="App">'
+        '<XCUIElementTypeButton type="Button" label="OK" x="10.5" y="20" width="30" height="40"/>'
+        '<XCUIElementTypeOther type="Other" visible="false">'
+        '<XCUIElementTypeButton type="Button" label="Hidden"/>'
+        "</XCUIElementTypeOther>"
+        '<XCUIElementTypeCell type="Cell" label="Row"/>'
+        "</XCUIElementTypeApplication>"
+    )
+
+    def summary() -> list[tuple]:
+        _, flat = UITreeParser().parse(xml)
+        return [(e.element_type, e.label, e.x, e.y, e.width, e.height) for e in flat]
+
+    fast = summary()
+    monkeypatch.setattr(ui_tree, "lxml_etree", None)
+    monkeypatch.setattr(ui_tree, "_XML_PARSE_ERRORS", (ui_tree.ET.ParseError,))
+
+    expected = [
+        ("Application", "App", 0, 0, 0, 0),
+        ("Button", "OK", 10, 20, 30, 40),
+        ("Cell", "Row", 0, 0, 0, 0),
+    ]
+    assert summary() == fast == expected
+    with pytest.raises(ValueError, match="Failed to parse XML"):
+        UITreeParser().parse("<broken")
+
+
+def test_find_element_by_predicate_combines_filters() -> None:
+    from mobile_pilot_mcp.ui_tree import find_element_by_predicate
+
+    tree = make_node(
+        "Application",
+        children=[
+            make_node("Button", "Sign In", identifier="login"),
+            make_node("Button", "Sign Up"),
+            make_node("TextField", None, name="Search"),
+        ],
+    )
+    _, flat = UITreeParser().parse(tree)
+
+    assert find_element_by_predicate(flat, {"identifier": "login"}).label == "Sign In"
+    assert find_element_by_predicate(flat, {"type": "button", "index": 1}).label == "Sign Up"
+    assert find_element_by_predicate(flat, {"text_contains": "SIGN"}).label == "Sign In"
+    assert find_element_by_predicate(flat, {"text_starts_with": "sea"}).name == "Search"
+    assert find_element_by_predicate(flat, {"text": "sign up"}) is None
+    assert find_element_by_predicate(flat, {"type": "Switch"}) is None
+
+
+def test_element_index_matches_linear_scan() -> None:
+    from mobile_pilot_mcp.ui_tree import ElementIndex, find_element_by_predicate
+
+    tree = make_node(
+        "Application",
+        children=[make_node("Button", f"Item {i}", identifier=f"id{i % 3}") for i in range(9)],
+    )
+    _, flat = UITreeParser().parse(tree)
+    index = ElementIndex(flat)
+
+    for predicate in (
+        {"identifier": "id1", "index": 2},
+        {"type": "BUTTON", "text_contains": "item 4"},
+        {"label": "Item 7"},
+        {"identifier": "id2", "label": "Item 1"},
+        {"text_starts_with": "item", "index": 5},
+        {"identifier": "missing"},
+    ):
+        assert find_element_by_predicate(index, predicate) is find_element_by_predicate(
+            flat, predicate
+        )
+
+
+def test_bounds_hint_selects_screen_region() -> None:
+    from mobile_pilot_mcp.ui_tree import find_element_by_predicate
+
+    def button(label: str, x: int, y: int) -> dict:
+        node = make_node("Button", label)
+        node["rect"] = {"x": x, "y": y, "width": 20, "height": 20}
+        return node
+
+    tree = make_node(
+        "Application",
+        children=[button("top", 300, 100), button("mid", 185, 412), button("bottom", 10, 700)],
+    )
+    _, flat = UITreeParser().parse(tree)
+
+    def find(hint: str) -> str:
+        return find_element_by_predicate(flat, {"type": "Button", "bounds_hint": hint}).label
+
+    assert find("top_half") == "top"
+    assert find("bottom_half") == "bottom"
+    assert find("left_half") == "mid"
+    assert find("right_half") == "top"
+    assert find("center") == "mid"
+    assert find("unknown") == "top"
+
+
+def test_only_interactable_skips_disabled_and_unlabelled_containers() -> None:
+    tree = make_node(
+        "Application",
+        "App",
+        children=[
+            make_node("Other", None, children=[make_node("Button", "Nested")]),
+            make_node("Button", "Off", isEnabled=False),
+            make_node("Cell", "Row", rect=None),
+        ],
+    )
+
+    _, flat = UITreeParser().parse(tree, only_interactable=True)
+
+    assert [(e.label, e.width) for e in flat] == [("App", 10), ("Row", 0)]
+
+
+def test_derived_fields_are_resolved_at_construction() -> None:
+    from mobile_pilot_mcp.ui_tree import UIElement
+
+    button = UIElement(0, "Button", x=10, y=20, width=31, height=41)
+    assert (button.center_x, button.center_y) == (25, 40)
+
+    assert UIElement(0, "Button", label="OK", name="ok_btn").display_text == "OK"
+    assert UIElement(0, "Slider", value=5, identifier="volume").display_text == "5"
+    assert UIElement(0, "Other", identifier="container").display_text == "container"
+    assert UIElement(0, "Other").display_text == ""
+
+
+def test_parse_can_skip_tree_links_or_flat_list() -> None:
+    tree = make_node("Application", "App", children=[make_node("Button", "OK")])
+    parser = UITreeParser()
+
+    root, flat = parser.parse(tree, build_tree=False)
+    assert [e.label for e in flat] == ["App", "OK"]
+    assert root is flat[0] and root.children == []
+
+    root, flat = parser.parse(tree, build_flat=False)
+    assert flat == []
+    assert [c.label for c in root.children] == ["OK"]
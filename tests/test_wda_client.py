@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from mobile_pilot_mcp.wda_client import WDAClient, WDAError
+
+
+def make_http_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def test_clients_share_injected_http_client() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"value": {"ready": True}})
+
+    http_client = make_http_client(handler)
+    first = WDAClient(host="127.0.0.1", port=8100, http_client=http_client)
+    second = WDAClient(host="10.0.0.2", port=8101, http_client=http_client)
+
+    assert await first.health_check()
+    assert await second.health_check()
+    assert seen == ["http://127.0.0.1:8100/status", "http://10.0.0.2:8101/status"]
+
+    await first.close()
+    assert not http_client.is_closed
+    await http_client.aclose()
+
+
+async def test_wda_error_payload_raises() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            404,
+            json={"value": {"error": "no such alert", "message": "No alert is open"}},
+        )
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    with pytest.raises(WDAError, match="no such alert: No alert is open") as excinfo:
+        await client.accept_alert()
+    assert excinfo.value.status_code == 404
+
+
+async def test_reset_and_create_session_skips_status_probe() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.method} {request.url.path}")
+        if request.method == "POST":
+            return httpx.Response(200, json={"value": {"sessionId": "new"}, "sessionId": "new"})
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "old"
+
+    assert await client.reset_and_create_session() == {"status": "ok", "session_id": "new"}
+    assert seen == ["DELETE /session/old", "POST /session"]
+
+
+async def test_reset_and_create_session_reports_unreachable_wda() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = WDAClient(http_client=make_http_client(handler))
+
+    assert await client.reset_and_create_session() == {"status": "unhealthy", "session_id": None}
+
+
+async def test_wait_for_keyboard_polls_until_shown() -> None:
+    polls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal polls
+        polls += 1
+        found = [{"ELEMENT": "kb"}] if polls == 3 else []
+        return httpx.Response(200, json={"value": found})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    assert await client.wait_for_keyboard(timeout=1.0, interval=0.001)
+    assert polls == 3
+
+    polls = -100
+    assert not await client.wait_for_keyboard(timeout=0.01, interval=0.001)
+
+
+async def test_wait_for_keyboard_timeout_bounds_a_slow_request() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={"value": []})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    assert not await asyncio.wait_for(client.wait_for_keyboard(timeout=0.05), 1.0)
+
+
+async def test_closed_shared_client_is_replaced_with_warning(caplog) -> None:
+    http_client = make_http_client(lambda request: httpx.Response(200, json={"value": {}}))
+    client = WDAClient(http_client=http_client)
+    await http_client.aclose()
+
+    with caplog.at_level("WARNING", logger="mobile_pilot_mcp.wda_client"):
+        replacement = await client._get_client()
+    assert "Shared HTTP client closed" in caplog.text
+    assert replacement is not http_client and not replacement.is_closed
+    await client.close()
+    assert replacement.is_closed
+
+
+async def test_tap_releases_actions_in_background() -> None:
+    seen: list[str] = []
+    release_started = asyncio.Event()
+    release_gate = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.method} {request.url.path}")
+        if request.method == "DELETE":
+            release_started.set()
+            await release_gate.wait()
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.tap(10, 20)
+    await release_started.wait()
+    assert seen == ["POST /session/abc/actions", "DELETE /session/abc/actions"]
+    assert not client._release_task.done()
+
+    # The next gesture waits for the pending release instead of racing it
+    second_tap = asyncio.create_task(client.tap(30, 40))
+    await asyncio.sleep(0.01)
+    assert seen == ["POST /session/abc/actions", "DELETE /session/abc/actions"]
+
+    release_gate.set()
+    await second_tap
+    await client._release_task
+    assert seen[2] == "POST /session/abc/actions"
+
+
+async def test_window_size_is_cached_until_orientation_changes() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(f"{request.method} {request.url.path}")
+        return httpx.Response(200, json={"value": {"width": 390, "height": 844}})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    assert await client.get_window_size() == {"width": 390, "height": 844}
+    await client.get_window_size()
+    assert seen == ["GET /session/abc/window/size"]
+
+    await client.set_orientation("LANDSCAPE")
+    await client.get_window_size()
+    assert seen[-1] == "GET /session/abc/window/size" and len(seen) == 3
+
+
+async def test_failed_health_check_is_not_cached() -> None:
+    fail = True
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if fail:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"value": {"ready": True}})
+
+    client = WDAClient(http_client=make_http_client(handler))
+
+    assert not await client.health_check()
+    fail = False
+    assert await client.health_check()
+    fail = True
+    assert await client.health_check()  # positive answer reused within STATUS_TTL
+
+
+async def test_empty_and_legacy_status_responses() -> None:
+    responses = iter(
+        [
+            httpx.Response(200),
+            httpx.Response(500),
+            httpx.Response(200, json={"status": 13, "value": "stale element"}),
+        ]
+    )
+    client = WDAClient(http_client=make_http_client(lambda request: next(responses)))
+
+    assert await client.get_status() == {"value": ""}
+    with pytest.raises(WDAError) as excinfo:
+        await client.get_status()
+    assert excinfo.value.status_code == 500
+    with pytest.raises(WDAError, match="status 13: stale element"):
+        await client.get_status()
+
+
+async def test_send_keys_sends_text_as_one_chunk() -> None:
+    bodies: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.content)
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.send_keys("héllo")
+    await client.send_keys_to_element("el", "hi")
+    assert [json.loads(body) for body in bodies] == [{"value": ["héllo"]}, {"value": ["hi"]}]
+
+
+async def test_gesture_templates_render_w3c_action_chains() -> None:
+    bodies: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            assert request.headers["Content-Type"] == "application/json"
+            bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.tap(10, 20)
+    await client.long_press(5, 6, duration=1.5)
+    await client.swipe(1, 2, 3, 4, duration=0.3)
+
+    def finger(steps: list[dict]) -> dict:
+        pointer = {"type": "pointer", "id": "finger1", "parameters": {"pointerType": "touch"}}
+        return {"actions": [{**pointer, "actions": steps}]}
+
+    down, up = {"type": "pointerDown", "button": 0}, {"type": "pointerUp", "button": 0}
+    assert bodies == [
+        finger(
+            [
+                {"type": "pointerMove", "duration": 0, "x": 10, "y": 20},
+                down,
+                {"type": "pause", "duration": 50},
+                up,
+            ]
+        ),
+        finger(
+            [
+                {"type": "pointerMove", "duration": 0, "x": 5, "y": 6},
+                down,
+                {"type": "pause", "duration": 1500},
+                up,
+            ]
+        ),
+        finger(
+            [
+                {"type": "pointerMove", "duration": 0, "x": 1, "y": 2},
+                down,
+                {"type": "pointerMove", "duration": 300, "x": 3, "y": 4},
+                up,
+            ]
+        ),
+    ]
+    await client._release_task
+
+
+async def test_unsupported_w3c_actions_switch_gestures_to_legacy_endpoints() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/actions"):
+            return httpx.Response(
+                404, json={"value": {"error": "unknown command", "message": "no route"}}
+            )
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.tap(1, 2)
+    await client.swipe(1, 2, 3, 4)
+    assert seen == [
+        "/session/abc/actions",
+        "/session/abc/wda/tap/0",
+        "/session/abc/wda/dragfromtoforduration",
+    ]
+
+    client.reset_strategy()
+    await client.double_tap(1, 2)
+    assert seen[-2:] == ["/session/abc/actions", "/session/abc/wda/doubleTap"]
+
+
+async def test_session_404_on_actions_does_not_switch_to_legacy() -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/actions") and len(seen) == 1:
+            return httpx.Response(
+                404, json={"value": {"error": "invalid session id", "message": "expired"}}
+            )
+        return httpx.Response(200, json={"value": None})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.tap(1, 2)
+    assert seen[:2] == ["/session/abc/actions", "/session/abc/wda/tap/0"]
+    assert client._actions_strategy == "unknown"
+
+    await client.swipe(1, 2, 3, 4)
+    assert seen[-1] == "/session/abc/actions"
+    assert client._actions_strategy == "w3c"
+
+
+@pytest.mark.parametrize("accelerated", [True, False])
+async def test_pasteboard_round_trips_base64(monkeypatch, accelerated) -> None:
+    from mobile_pilot_mcp import wda_client
+
+    if not accelerated:
+        monkeypatch.setattr(wda_client, "pybase64", None)
+    stored: dict[str, str] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.path.endswith("/setPasteboard"):
+            stored["content"] = body["content"]
+            return httpx.Response(200, json={"value": None})
+        return httpx.Response(200, json={"value": stored["content"]})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.set_pasteboard("héllo ✓")
+    assert stored["content"] == "aMOpbGxvIOKckw=="
+    assert await client.get_pasteboard() == "héllo ✓"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+async def test_request_json_codec_fallback(monkeypatch, use_orjson) -> None:
+    from mobile_pilot_mcp import wda_client
+
+    if not use_orjson:
+        monkeypatch.setattr(wda_client, "orjson", None)
+    seen: list[tuple[str, dict]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.headers["Content-Type"], json.loads(request.content)))
+        return httpx.Response(200, json={"value": {"label": "é", "rect": {"x": 1.5}}})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    assert await client.get_app_state("com.example") == {"label": "é", "rect": {"x": 1.5}}
+    assert seen == [("application/json", {"bundleId": "com.example"})]
+
+
+async def test_find_many_sends_each_distinct_query_once() -> None:
+    queries: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        value = json.loads(request.content)["value"]
+        queries.append(value)
+        return httpx.Response(200, json={"value": [{"ELEMENT": f"{value}-1"}]})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    button = ("class name", "XCUIElementTypeButton")
+    field = ("class name", "XCUIElementTypeTextField")
+    found = await client.find_many([button, field, button])
+
+    assert sorted(queries) == ["XCUIElementTypeButton", "XCUIElementTypeTextField"]
+    assert [e.element_id for e in found[field]] == ["XCUIElementTypeTextField-1"]
+    assert list(found) == [button, field]
+
+
+async def test_quick_endpoints_use_tighter_timeouts() -> None:
+    timeouts: dict[str, float] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts[request.url.path] = request.extensions["timeout"]["read"]
+        return httpx.Response(200, json={"value": {}})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    await client.get_status()
+    await client.get_source()
+    await client.tap(1, 2)
+    await client._release_task
+
+    assert timeouts["/status"] == 2.0
+    assert timeouts["/session/abc/source"] == 30.0
+    assert timeouts["/session/abc/actions"] == 5.0  # the client default
+
+
+async def test_concurrent_identical_gets_share_one_request() -> None:
+    requests: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"value": "PORTRAIT"})
+
+    client = WDAClient(http_client=make_http_client(handler))
+    client.session_id = "abc"
+
+    orientations = await asyncio.gather(*(client.get_orientation() for _ in range(5)))
+    assert requests == ["/session/abc/orientation"]
+    assert orientations == ["PORTRAIT"] * 5
+    assert client._inflight == {}
+
+    await client.get_orientation()
+    assert len(requests) == 2
+
+    # The source can change under a concurrent tap, so each fetch is its own request
+    await asyncio.gather(client.get_source(), client.get_source())
+    assert requests[2:] == ["/session/abc/source", "/session/abc/source"]